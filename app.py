@@ -5,187 +5,424 @@ A local Flask web server that provides a user-friendly interface for the DeepSta
 """
 
 import os
-import json
+import sys
+import gzip
+import logging
 import subprocess
-import tempfile
+import multiprocessing
 import uuid
-from datetime import datetime
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta, timezone
+from functools import partial
 from pathlib import Path
-from urllib.parse import urlparse
-from flask import Flask, render_template, request, jsonify, send_from_directory
+from flask import Flask, Response, render_template, request, jsonify, send_file, send_from_directory
+from flask.json.provider import JSONProvider
 from flask_cors import CORS
+from flask_compress import Compress
+import orjson
 import threading
 import time
 
+# Log level comes from DS_LOG (e.g. DEBUG, INFO, WARNING); messages are formatted lazily
+logging.basicConfig(level=os.environ.get('DS_LOG', 'INFO'))
+log = logging.getLogger('deepstack')
+
+# Make the collector in src/ importable; analyses run it in the worker pool
+sys.path.insert(0, str(Path(__file__).parent / 'src'))
+from deepstack_collector import analyze as analyze_url, build_collection_output, build_error_result
+
+class OrjsonProvider(JSONProvider):
+    """JSON provider backed by orjson, used by jsonify() and request.json"""
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
 app = Flask(__name__, template_folder='.')
+app.json = OrjsonProvider(app)
 CORS(app)
 
+# gzip JSON responses (e.g. /api/status) for clients that accept it. /api/result
+# already serves a precompressed copy, which Compress leaves untouched.
+app.config['COMPRESS_ALGORITHM'] = 'gzip'
+app.config['COMPRESS_MIMETYPES'] = ['application/json']
+app.config['COMPRESS_LEVEL'] = 5
+app.config['COMPRESS_MIN_SIZE'] = 1024
+Compress(app)
+
+# Port for the development server (5000 is often used by macOS AirPlay). The
+# /api/test self-check is only served in debug mode or with DS_ENABLE_TEST set.
+PORT = int(os.environ.get('DS_PORT', 5001))
+ENABLE_TEST_ENDPOINT = bool(os.environ.get('DS_ENABLE_TEST'))
+
+# Paths used by the collector self-test; they never change at runtime
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+VENV_PYTHON = os.path.join(SCRIPT_DIR, 'venv', 'bin', 'python')
+if not os.path.exists(VENV_PYTHON):
+    VENV_PYTHON = sys.executable
+COLLECTOR_SCRIPT = os.path.join(SCRIPT_DIR, 'src', 'deepstack_collector.py')
+
+# Created at import so it also exists when the app is served by a WSGI server (see wsgi.py)
+OUTPUT_DIR = Path(SCRIPT_DIR) / 'output'
+OUTPUT_DIR.mkdir(exist_ok=True)
+
 # Global storage for analysis jobs (in production, use Redis or database)
 analysis_jobs = {}
 
+# Finished jobs are dropped from memory after JOB_TTL_SECONDS, or oldest-first once more
+# than MAX_JOBS_IN_MEMORY are held; their persisted records keep serving status/result requests
+JOB_TTL_SECONDS = int(os.environ.get('DS_JOB_TTL', 3600))
+MAX_JOBS_IN_MEMORY = 1024
+
+# /api/stream waits on a job's change notifications; a keepalive comment is sent when
+# nothing changed for STREAM_KEEPALIVE_SECONDS. Jobs owned by another worker process
+# are followed by re-reading their persisted record every STREAM_DISK_POLL_SECONDS.
+STREAM_KEEPALIVE_SECONDS = 15
+STREAM_DISK_POLL_SECONDS = 2
+
+# Every job is also persisted to output/jobs/<job_id>.json so its status and result
+# survive a server restart and can be served by any worker process, not only the
+# one that ran it. Completed results are stored beside it as <job_id>.result.json
+# (plus a gzip copy) and served straight from disk.
+JOBS_DIR = OUTPUT_DIR / 'jobs'
+
+# A job record names the process running it by pid and BOOT_ID. Each process writes
+# its BOOT_ID to OWNERS_DIR/<pid>, so an unfinished job whose owner has exited, or
+# whose pid now belongs to a process from a later start, is reported as an error.
+OWNERS_DIR = JOBS_DIR / 'owners'
+BOOT_ID = uuid.uuid4().hex
+_owner = None
+
+# Parsed JSON files keyed by path and validated against (mtime, size), so repeated
+# status/result requests for a persisted job don't re-parse an unchanged file
+JSON_CACHE_MAX_ENTRIES = 128
+_json_cache = OrderedDict()
+_json_cache_lock = threading.Lock()
+
+# Every job fans its URLs out across worker processes so page parsing isn't serialized
+# on the GIL and no server thread blocks while a page loads. The pool is created lazily
+# with the 'spawn' start method so that importing app.py never forks a multi-threaded process.
+# A new job is refused with 429 if its URLs would take more than MAX_PENDING_URLS URLs
+# queued or running, and with 400 if it has more than MAX_URLS_PER_JOB URLs.
+MAX_WORKERS = int(os.environ.get('DS_WORKERS', min(8, os.cpu_count() or 1)))
+MAX_PENDING_URLS = int(os.environ.get('DS_MAX_PENDING', 50))
+MAX_URLS_PER_JOB = min(int(os.environ.get('DS_MAX_URLS_PER_JOB', MAX_PENDING_URLS)), MAX_PENDING_URLS)
+_executor = None
+_executor_lock = threading.Lock()
+_pending_urls = 0
+
+# Finished jobs are serialized and written here rather than in the future callbacks,
+# which run on the process pool's management thread and would hold up every other job
+_result_writer = ThreadPoolExecutor(max_workers=2, thread_name_prefix='result-writer')
+
+def get_executor():
+    """Return the shared process pool used for analyses, creating it on first use"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(
+                max_workers=MAX_WORKERS,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+        return _executor
+
+def reset_executor(broken):
+    """Discard a pool whose worker died, so the next get_executor() call starts a new one"""
+    global _executor
+    with _executor_lock:
+        if _executor is broken:
+            _executor = None
+    broken.shutdown(wait=False, cancel_futures=True)
+
+def reserve_urls(count):
+    """Count a job's URLs as pending if they fit under MAX_PENDING_URLS; returns False if not"""
+    global _pending_urls
+    with _executor_lock:
+        if _pending_urls + count > MAX_PENDING_URLS:
+            return False
+        _pending_urls += count
+        return True
+
+def release_urls(count):
+    """Stop counting URLs reserved with reserve_urls() as pending"""
+    global _pending_urls
+    with _executor_lock:
+        _pending_urls -= count
+
+def _url_finished(future):
+    release_urls(1)
+
+def submit_url(url):
+    """Queue one reserved URL on the process pool; it is released when it finishes.
+
+    If submitting fails the URL stays reserved, and the caller must release it.
+    """
+    executor = get_executor()
+    try:
+        future = executor.submit(analyze_url, url)
+    except BrokenProcessPool:
+        # A worker died (e.g. OOM-killed mid-run); replace the pool and retry once
+        log.warning("Process pool is broken, starting a new one")
+        reset_executor(executor)
+        future = get_executor().submit(analyze_url, url)
+    future.add_done_callback(_url_finished)
+    return future
+
 class AnalysisJob:
-    def __init__(self, job_id, urls, job_type='single'):
+    # Jobs can stay in analysis_jobs for up to JOB_TTL_SECONDS; slots drop the
+    # per-instance __dict__ and make the attribute reads made while polling cheaper
+    __slots__ = ('job_id', 'urls', 'job_type', 'status', 'progress', 'result_path',
+                 'error', 'created_at', 'started_at', 'completed_at', 'owner', 'changed', '_static')
+
+    def __init__(self, job_id, urls, job_type='single', created_at=None):
         self.job_id = job_id
         self.urls = urls
         self.job_type = job_type
         self.status = 'pending'  # pending, running, completed, error
         self.progress = 0
-        self.result = None
+        self.result_path = None
         self.error = None
-        self.created_at = datetime.utcnow()
+        self.created_at = created_at or datetime.utcnow()
         self.started_at = None
         self.completed_at = None
+        self.owner = None  # {'pid', 'boot_id'} of the process running the job, see job_owner()
+        # Notified on every status change so /api/stream listeners don't have to poll
+        self.changed = threading.Condition()
+        # Fields that never change after creation, built once instead of on every status poll
+        self._static = {
+            'job_id': job_id,
+            'urls': urls,
+            'job_type': job_type,
+            'created_at': self.created_at.isoformat()
+        }
         
     def to_dict(self):
+        """Status record for the job; the result itself is only served by /api/result"""
         return {
-            'job_id': self.job_id,
-            'urls': self.urls,
-            'job_type': self.job_type,
+            **self._static,
             'status': self.status,
             'progress': self.progress,
-            'result': self.result,
             'error': self.error,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
             'started_at': self.started_at.isoformat() if self.started_at else None,
             'completed_at': self.completed_at.isoformat() if self.completed_at else None
         }
 
+    @classmethod
+    def from_dict(cls, record):
+        """Rebuild a job from a record written by save_job().
+
+        An unfinished job whose owning process is gone can never finish, so it is
+        reported as an error instead of running forever.
+        """
+        job = cls(record['job_id'], record['urls'], record['job_type'],
+                  datetime.fromisoformat(record['created_at']))
+        job.status = record['status']
+        job.progress = record['progress']
+        job.error = record['error']
+        job.owner = record.get('owner')
+        for field in ('started_at', 'completed_at'):
+            if record[field]:
+                setattr(job, field, datetime.fromisoformat(record[field]))
+        if job.status == 'completed':
+            job.result_path = JOBS_DIR / f'{job.job_id}.result.json'
+        elif job.status in ('pending', 'running') and not owner_is_alive(job.owner):
+            job.status = 'error'
+            job.error = 'Analysis was interrupted by a server restart'
+        return job
+
+def write_file_atomic(path, data):
+    """Write bytes to path via a temporary file so readers never see a partial file"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + '.tmp')
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+def job_owner():
+    """Return this process's {'pid', 'boot_id'}, registering it in OWNERS_DIR on first use"""
+    global _owner
+    pid = os.getpid()
+    if _owner is None or _owner['pid'] != pid:  # also re-registers in forked workers
+        write_file_atomic(OWNERS_DIR / str(pid), BOOT_ID.encode())
+        _owner = {'pid': pid, 'boot_id': BOOT_ID}
+    return _owner
+
+def owner_is_alive(owner):
+    """Whether the process recorded as a job's owner is still running"""
+    if not owner:
+        return False  # record written before owners were tracked
+    try:
+        os.kill(owner['pid'], 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass  # exists but belongs to another user; the boot id check decides
+    try:
+        return (OWNERS_DIR / str(owner['pid'])).read_bytes().decode() == owner['boot_id']
+    except FileNotFoundError:
+        return False
+
+def save_job(job):
+    """Persist the job's current state to JOBS_DIR and wake any /api/stream listeners"""
+    try:
+        write_file_atomic(JOBS_DIR / f'{job.job_id}.json',
+                          orjson.dumps({**job.to_dict(), 'owner': job.owner},
+                                       option=orjson.OPT_NON_STR_KEYS))
+    finally:
+        with job.changed:
+            job.changed.notify_all()
+
+def save_result(job, result):
+    """Write a job's result, and a gzip copy for clients that accept it, to JOBS_DIR.
+
+    The result is not kept on the job; /api/result serves it from disk when asked.
+    """
+    data = orjson.dumps(result, option=orjson.OPT_NON_STR_KEYS)
+    result_path = JOBS_DIR / f'{job.job_id}.result.json'
+    write_file_atomic(result_path, data)
+    write_file_atomic(result_path.with_name(result_path.name + '.gz'), gzip.compress(data, compresslevel=6))
+    job.result_path = result_path
+
+def load_json_cached(path):
+    """Load a JSON file, reusing the previously parsed object while the file is unchanged"""
+    st = os.stat(path)
+    key = str(path)
+    with _json_cache_lock:
+        cached = _json_cache.get(key)
+        if cached and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+            _json_cache.move_to_end(key)
+            return cached[2]
+    with open(path, 'rb') as f:
+        obj = orjson.loads(f.read())
+    with _json_cache_lock:
+        _json_cache[key] = (st.st_mtime_ns, st.st_size, obj)
+        _json_cache.move_to_end(key)
+        while len(_json_cache) > JSON_CACHE_MAX_ENTRIES:
+            _json_cache.popitem(last=False)
+    return obj
+
+def load_job(job_id):
+    """Look up a job in memory, falling back to its persisted record"""
+    job = analysis_jobs.get(job_id)
+    if job is not None:
+        return job
+    try:
+        uuid.UUID(job_id)  # Job ids are UUIDs; never build a path from anything else
+        return AnalysisJob.from_dict(load_json_cached(JOBS_DIR / f'{job_id}.json'))
+    except (ValueError, FileNotFoundError):
+        return None
+
+def prune_jobs():
+    """Evict expired finished jobs from memory, and the oldest ones if over the size cap"""
+    cutoff = datetime.utcnow() - timedelta(seconds=JOB_TTL_SECONDS)
+    finished = [job for job in list(analysis_jobs.values())
+                if job.status in ('completed', 'error') and job.completed_at]
+    finished.sort(key=lambda job: job.completed_at)
+    excess = len(analysis_jobs) - MAX_JOBS_IN_MEMORY
+    for job in finished:
+        if job.completed_at >= cutoff and excess <= 0:
+            break
+        analysis_jobs.pop(job.job_id, None)
+        excess -= 1
+
+def normalize_urls(text):
+    """Split pasted/uploaded text into a list of unique URLs, in first-seen order.
+
+    Blank lines and '#' comments are skipped and https:// is added to URLs without
+    a protocol, so the same site listed twice is only analyzed once.
+    """
+    urls = {}
+    for line in text.splitlines():
+        url = line.strip()
+        if not url or url[0] == '#':
+            continue
+        if not url.startswith(('http://', 'https://')):
+            url = 'https://' + url
+        urls[url] = None
+    return list(urls)
+
 def run_deepstack_analysis(job):
-    """Run the deepstack collector in a separate thread"""
+    """Dispatch a job's URLs to the collector process pool and return immediately.
+
+    Progress is tracked by future callbacks, so no thread sits blocked for the
+    minutes a collection can take, and the finished result is written by
+    _result_writer. The job's URLs must already be
+    reserved with reserve_urls(); any that can't be submitted are released here.
+    """
+    log.debug("Starting analysis for job %s, URLs: %s", job.job_id, job.urls)
+    
+    # Per-URL failures are recorded in the result object (fetch_status "error")
+    # just like the CLI output file
+    collection_start_time_utc = datetime.now(timezone.utc)
+    url_results = [None] * len(job.urls)
+    pending = set(range(len(job.urls)))
+    lock = threading.Lock()
+    
+    def finish(error=None):
+        if error is None:
+            job.progress = 100
+            job.status = 'completed'
+        else:
+            job.error = str(error)
+            job.status = 'error'
+        job.completed_at = datetime.utcnow()
+        try:
+            save_job(job)
+        except OSError as e:
+            log.warning("Could not persist job %s: %s", job.job_id, e)
+    
+    def url_done(index, future):
+        try:
+            result = future.result()
+        except BaseException as e:
+            # The worker died or the collector raised past analyze() (e.g. its
+            # AnalysisTimeout); record the URL as failed and keep the others
+            log.warning("Analysis of %s failed: %s", job.urls[index], e)
+            result = build_error_result(job.urls[index], e)
+        with lock:
+            if job.status != 'running':
+                return  # the job already failed
+            url_results[index] = result
+            pending.discard(index)
+            if pending:
+                job.progress = 10 + 80 * (len(url_results) - len(pending)) // len(url_results)
+                try:
+                    save_job(job)
+                except OSError as e:
+                    log.warning("Could not persist job %s: %s", job.job_id, e)
+                return
+        _result_writer.submit(write_result)
+    
+    def write_result():
+        # Runs once, after every URL is done; results are indexed by submission
+        # order regardless of completion order
+        try:
+            save_result(job, build_collection_output(url_results, collection_start_time_utc))
+        except Exception as e:
+            finish(e)
+            return
+        finish()
+    
+    submitted = 0
     try:
         job.status = 'running'
         job.started_at = datetime.utcnow()
         job.progress = 10
+        save_job(job)
         
-        print(f"[DEBUG] Starting analysis for job {job.job_id}")
-        print(f"[DEBUG] URLs: {job.urls}")
-        
-        # Ensure we're in the correct directory
-        script_dir = os.path.dirname(os.path.abspath(__file__))
-        os.chdir(script_dir)
-        print(f"[DEBUG] Working directory: {script_dir}")
-        
-        # Prepare virtual environment activation and run the collector
-        venv_activate = os.path.join(script_dir, 'venv', 'bin', 'activate')
-        venv_python = os.path.join(script_dir, 'venv', 'bin', 'python')
-        
-        # Check if virtual environment exists
-        if not os.path.exists(venv_python):
-            print("[DEBUG] Virtual environment not found, using system python")
-            venv_python = 'python3'  # Fallback if venv not found
-        print(f"[DEBUG] Using Python: {venv_python}")
-        
-        collector_script = os.path.join(script_dir, 'src', 'deepstack_collector.py')
-        print(f"[DEBUG] Collector script: {collector_script}")
-        
-        if job.job_type == 'single' and len(job.urls) == 1:
-            # Single URL mode - use bash to activate venv first
-            bash_cmd = None
-            if os.path.exists(venv_activate):
-                # Create bash command to activate venv and run script
-                bash_cmd = f"source {venv_activate} && {venv_python} {collector_script} -u {job.urls[0]}"
-                cmd = ['bash', '-c', bash_cmd]
-            else:
-                # Fallback to direct execution
-                cmd = [venv_python, collector_script, '-u', job.urls[0]]
-                
-            print(f"[DEBUG] Running command: {bash_cmd if bash_cmd else ' '.join(cmd)}")
-            job.progress = 50
-            
-            # Run the command with real-time output
-            process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, cwd=script_dir)
-            stdout, stderr = process.communicate(timeout=300)
-            
-            print(f"[DEBUG] Command completed with return code: {process.returncode}")
-            if stdout:
-                print(f"[DEBUG] STDOUT: {stdout[:500]}...")
-            if stderr:
-                print(f"[DEBUG] STDERR: {stderr[:500]}...")
-            
-            result = process
-            
-            if result.returncode == 0:
-                # Find the output file
-                parsed_url = urlparse(job.urls[0])
-                domain = parsed_url.netloc.replace('www.', '').replace(':', '_')
-                output_file = os.path.join(script_dir, 'output', f'deepstack_output-{domain}.json')
-                
-                if os.path.exists(output_file):
-                    with open(output_file, 'r') as f:
-                        job.result = json.load(f)
-                else:
-                    job.error = "Output file not found"
-                    job.status = 'error'
-                    return
-            else:
-                job.error = f"Script failed: {result.stderr}"
-                job.status = 'error'
-                return
-        else:
-            # Batch mode - create temporary file
-            with tempfile.NamedTemporaryFile(mode='w', suffix='.txt', delete=False) as temp_file:
-                for url in job.urls:
-                    temp_file.write(url + '\n')
-                temp_file_path = temp_file.name
-            
-            try:
-                # Copy temp file to urls_to_analyze.txt
-                urls_file = os.path.join(script_dir, 'urls_to_analyze.txt')
-                with open(temp_file_path, 'r') as src, open(urls_file, 'w') as dst:
-                    dst.write(src.read())
-                
-                job.progress = 30
-                
-                # Run in batch mode - use bash to activate venv first
-                if os.path.exists(venv_activate):
-                    # Create bash command to activate venv and run script
-                    bash_cmd = f"source {venv_activate} && {venv_python} {collector_script}"
-                    cmd = ['bash', '-c', bash_cmd]
-                else:
-                    # Fallback to direct execution
-                    cmd = [venv_python, collector_script]
-                
-                result = subprocess.run(cmd, capture_output=True, text=True, timeout=600, cwd=script_dir)
-                
-                job.progress = 80
-                
-                if result.returncode == 0:
-                    # Find the output file
-                    output_file = os.path.join(script_dir, 'output', 'deepstack_output.json')
-                    
-                    if os.path.exists(output_file):
-                        with open(output_file, 'r') as f:
-                            job.result = json.load(f)
-                    else:
-                        job.error = "Output file not found"
-                        job.status = 'error'
-                        return
-                else:
-                    job.error = f"Script failed: {result.stderr}"
-                    job.status = 'error'
-                    return
-            finally:
-                # Clean up temporary files
-                try:
-                    os.unlink(temp_file_path)
-                    if os.path.exists(urls_file):
-                        os.unlink(urls_file)
-                except:
-                    pass  # Ignore cleanup errors
-        
-        job.progress = 100
-        job.status = 'completed'
-        job.completed_at = datetime.utcnow()
-        
-    except subprocess.TimeoutExpired:
-        job.error = "Analysis timed out"
-        job.status = 'error'
+        for index, url in enumerate(job.urls):
+            future = submit_url(url)
+            submitted += 1
+            future.add_done_callback(partial(url_done, index))
     except Exception as e:
-        job.error = str(e)
-        job.status = 'error'
-    finally:
-        if job.status != 'completed':
-            job.completed_at = datetime.utcnow()
+        release_urls(len(job.urls) - submitted)
+        with lock:
+            if job.status == 'running':
+                finish(e)
 
 @app.route('/')
 def index():
@@ -215,32 +452,38 @@ def analyze():
             
         elif 'urls' in data and data['urls']:
             # Multiple URLs
-            url_text = data['urls'].strip()
-            urls = [url.strip() for url in url_text.split('\n') if url.strip() and not url.strip().startswith('#')]
-            # Add https:// to URLs that don't have a protocol
-            urls = [url if url.startswith(('http://', 'https://')) else 'https://' + url for url in urls]
+            urls = normalize_urls(data['urls'])
             job_type = 'batch'
             
         elif 'file_content' in data and data['file_content']:
             # File upload content
-            file_content = data['file_content'].strip()
-            urls = [url.strip() for url in file_content.split('\n') if url.strip() and not url.strip().startswith('#')]
-            # Add https:// to URLs that don't have a protocol
-            urls = [url if url.startswith(('http://', 'https://')) else 'https://' + url for url in urls]
+            urls = normalize_urls(data['file_content'])
             job_type = 'batch'
         
         if not urls:
             return jsonify({'error': 'No valid URLs provided'}), 400
         
+        if len(urls) > MAX_URLS_PER_JOB:
+            return jsonify({'error': f'Too many URLs, at most {MAX_URLS_PER_JOB} can be analyzed per job'}), 400
+        
+        if not reserve_urls(len(urls)):
+            return (jsonify({'error': 'Too many analyses in progress, please try again shortly'}),
+                    429, {'Retry-After': '10'})
+        
         # Create new job
-        job_id = str(uuid.uuid4())
-        job = AnalysisJob(job_id, urls, job_type)
-        analysis_jobs[job_id] = job
+        try:
+            prune_jobs()
+            job_id = str(uuid.uuid4())
+            job = AnalysisJob(job_id, urls, job_type)
+            job.owner = job_owner()
+            analysis_jobs[job_id] = job
+            save_job(job)
+        except Exception:
+            release_urls(len(urls))
+            raise
         
-        # Start analysis in background thread
-        thread = threading.Thread(target=run_deepstack_analysis, args=(job,))
-        thread.daemon = True
-        thread.start()
+        # Hand the URLs to the process pool; this returns without waiting for them
+        run_deepstack_analysis(job)
         
         return jsonify({
             'job_id': job_id,
@@ -255,27 +498,74 @@ def analyze():
 @app.route('/api/status/<job_id>')
 def get_status(job_id):
     """Get the status of an analysis job"""
-    if job_id not in analysis_jobs:
+    job = load_job(job_id)
+    if job is None:
         return jsonify({'error': 'Job not found'}), 404
     
-    job = analysis_jobs[job_id]
     return jsonify(job.to_dict())
 
+@app.route('/api/stream/<job_id>')
+def stream_status(job_id):
+    """Push the status of an analysis job as Server-Sent Events until it finishes"""
+    job = load_job(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    
+    def events():
+        current = job
+        last = None
+        while True:
+            record = current.to_dict()
+            state = (record['status'], record['progress'])
+            if state != last:
+                yield f"data: {orjson.dumps(record, option=orjson.OPT_NON_STR_KEYS).decode()}\n\n"
+                last = state
+            if record['status'] in ('completed', 'error'):
+                return
+            if current is analysis_jobs.get(job_id):
+                with current.changed:
+                    if (current.status, current.progress) == last:
+                        current.changed.wait(STREAM_KEEPALIVE_SECONDS)
+            else:
+                # Job is being run by another worker process; follow its persisted record
+                time.sleep(STREAM_DISK_POLL_SECONDS)
+                current = load_job(job_id) or current
+            if (current.status, current.progress) == last:
+                # Comment line keeps proxies from timing out and surfaces closed clients
+                yield ": keepalive\n\n"
+    
+    return Response(events(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
 @app.route('/api/result/<job_id>')
 def get_result(job_id):
     """Get the result of a completed analysis job"""
-    if job_id not in analysis_jobs:
+    job = load_job(job_id)
+    if job is None:
         return jsonify({'error': 'Job not found'}), 404
     
-    job = analysis_jobs[job_id]
-    
     if job.status != 'completed':
         return jsonify({'error': 'Job not completed yet'}), 400
     
-    if not job.result:
+    if not job.result_path:
         return jsonify({'error': 'No result available'}), 404
     
-    return jsonify(job.result)
+    # Serve the stored file as-is: no re-serialization, and conditional=True gives
+    # ETag/Last-Modified handling so unchanged results are answered with 304
+    try:
+        if 'gzip' in request.accept_encodings:
+            try:
+                response = send_file(job.result_path.with_name(job.result_path.name + '.gz'),
+                                     mimetype='application/json', conditional=True)
+                response.headers['Content-Encoding'] = 'gzip'
+            except FileNotFoundError:
+                response = send_file(job.result_path, mimetype='application/json', conditional=True)
+        else:
+            response = send_file(job.result_path, mimetype='application/json', conditional=True)
+    except FileNotFoundError:
+        return jsonify({'error': 'No result available'}), 404
+    response.headers['Vary'] = 'Accept-Encoding'
+    return response
 
 @app.route('/health')
 def health():
@@ -285,38 +575,30 @@ def health():
 @app.route('/api/test')
 def test_collector():
     """Test endpoint to verify collector script works"""
+    if not (app.debug or ENABLE_TEST_ENDPOINT):
+        return jsonify({'error': 'Not found'}), 404
+    
     try:
-        script_dir = os.path.dirname(os.path.abspath(__file__))
-        venv_python = os.path.join(script_dir, 'venv', 'bin', 'python')
-        if not os.path.exists(venv_python):
-            venv_python = 'python3'
-        
-        collector_script = os.path.join(script_dir, 'src', 'deepstack_collector.py')
-        
         # Test with help flag to see if script loads
-        cmd = [venv_python, collector_script, '--help']
+        cmd = [VENV_PYTHON, COLLECTOR_SCRIPT, '--help']
         result = subprocess.run(cmd, capture_output=True, text=True, timeout=10)
         
         return jsonify({
             'returncode': result.returncode,
             'stdout': result.stdout[:500],
             'stderr': result.stderr[:500],
-            'python_path': venv_python,
-            'script_exists': os.path.exists(collector_script),
-            'script_path': collector_script
+            'python_path': VENV_PYTHON,
+            'script_exists': os.path.exists(COLLECTOR_SCRIPT),
+            'script_path': COLLECTOR_SCRIPT
         })
     except Exception as e:
         return jsonify({'error': str(e)})
 
 if __name__ == '__main__':
-    # Ensure output directory exists
-    output_dir = Path('output')
-    output_dir.mkdir(exist_ok=True)
-    
     print("🚀 Starting DeepStack Collector Web Interface...")
-    print("📊 Open your browser to: http://localhost:5001")
+    print(f"📊 Open your browser to: http://localhost:{PORT}")
     print("⚠️  Make sure you've activated the virtual environment and installed requirements!")
     print("💡 To stop the server, press Ctrl+C")
     
-    # Run Flask app on port 5001 (5000 is often used by macOS AirPlay)
-    app.run(host='127.0.0.1', port=5001, debug=True, threaded=True)
\ No newline at end of file
+    # This is the development server; use wsgi.py with gunicorn for anything heavier.
+    app.run(host='127.0.0.1', port=PORT, threaded=True)
\ No newline at end of file
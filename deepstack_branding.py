@@ -26,23 +26,16 @@ Usage:
 """
 
 import sys
-import os
 from pathlib import Path
 
 # Add the src directory to Python path
 src_dir = Path(__file__).parent / "src"
 sys.path.insert(0, str(src_dir))
 
-# Change working directory to maintain relative path compatibility
-original_cwd = os.getcwd()
-os.chdir(Path(__file__).parent)
+# Import and run the main branding collector
+from deepstack_branding_collector import main
 
-try:
-    # Import and run the main branding collector
-    from deepstack_branding_collector import main
-
-    if __name__ == "__main__":
-        main()
-finally:
-    # Restore original working directory
-    os.chdir(original_cwd)
+if __name__ == "__main__":
+    # Resolve urls_to_analyze.txt and output/ against the project root rather than
+    # changing the process-wide working directory
+    main(base_dir=Path(__file__).parent)
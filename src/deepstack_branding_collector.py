@@ -21,16 +21,20 @@ Usage:
         # Output: output/deepstack_branding.json (reads from urls_to_analyze.txt)
 """
 
-from playwright.sync_api import sync_playwright
-import time
-from bs4 import BeautifulSoup
+from playwright.async_api import async_playwright
+import asyncio
 import re
 import json
+import orjson
 from datetime import datetime, timezone
 import random
 import argparse
-from urllib.parse import urlparse
+from collections import Counter, defaultdict
+from urllib.parse import urlparse, parse_qs
 import os
+from pathlib import Path
+import shutil
+import time
 
 
 # -----------------------------------------------------------------------------
@@ -70,9 +74,281 @@ FONT_SERVICE_SIGNATURES = {
     ]
 }
 
+# All service patterns combined into one case-insensitive regex, so each request URL
+# is scanned once. Service names aren't valid group names ("Fonts.com"), so groups
+# are numbered and mapped back through _FONT_SERVICE_GROUPS.
+_FONT_SERVICE_GROUPS = {f"s{i}": name for i, name in enumerate(FONT_SERVICE_SIGNATURES)}
+_FONT_RE = re.compile(
+    "|".join(f"(?P<{group}>{'|'.join(FONT_SERVICE_SIGNATURES[name])})"
+             for group, name in _FONT_SERVICE_GROUPS.items()),
+    re.IGNORECASE
+)
+
+# --- Color Value Patterns ---
+_HEX_RE = re.compile(r'^#[0-9a-f]{3,8}$')
+# Named colors recognized as color values (basic check)
+_NAMED_COLORS = frozenset(('red', 'blue', 'green', 'yellow', 'black', 'white',
+                           'gray', 'grey', 'purple', 'orange', 'pink', 'brown'))
+
+# --- Cloudflare Challenge Titles ---
+_CF_RE = re.compile(r"just a moment|checking your browser|please wait", re.IGNORECASE)
+
+# --- Logo Lookup ---
+# Checked in order; the first image found with a src is the logo
+LOGO_SELECTORS = (
+    'img[class*="logo" i]',
+    'img[id*="logo" i]',
+    'a[class*="logo" i] img',
+    '.logo img',
+    '#logo img',
+    'header img',
+    'nav img'
+)
+
+# --- In-Page Analysis Script ---
+# Collects :root CSS variables, element colors, element typography, visual assets (logo,
+# SVG logos, favicons, og:image), design patterns and the document title in a single
+# page.evaluate() round-trip.
+# Computed styles are cached per element, so an element matched by several of the
+# lookups is only styled once.
+PAGE_ANALYSIS_JS = r"""
+(logoSelectors) => {
+    const cssVars = {};
+    for (const sheet of document.styleSheets) {
+        try {
+            for (const rule of sheet.cssRules || sheet.rules) {
+                if (rule.selectorText === ':root' && rule.style) {
+                    for (let i = 0; i < rule.style.length; i++) {
+                        const prop = rule.style[i];
+                        if (prop.startsWith('--')) {
+                            cssVars[prop] = rule.style.getPropertyValue(prop).trim();
+                        }
+                    }
+                }
+            }
+        } catch (e) { /* CORS or invalid rule */ }
+    }
+
+    const styles = new Map();
+    const styleOf = (el) => {
+        let style = styles.get(el);
+        if (!style) {
+            style = getComputedStyle(el);
+            styles.set(el, style);
+        }
+        return style;
+    };
+
+    const colorSelectors = [
+        'body',
+        'header',
+        'nav',
+        'h1', 'h2', 'h3',
+        'a',
+        'button',
+        '.btn', '.button',
+        'footer',
+        '.hero', '.banner',
+        '[class*="primary"]',
+        '[class*="secondary"]'
+    ];
+    // rgb()/rgba() to hex; transparent colors come back as null
+    const rgbPattern = /^rgba?\((\d+),\s*(\d+),\s*(\d+)(?:,\s*[\d.]+)?\)/;
+    const toHex = (value) => {
+        if (!value || value === 'transparent' || value === 'rgba(0, 0, 0, 0)') return null;
+        const m = value.match(rgbPattern);
+        return m ? '#' + [m[1], m[2], m[3]].map(x => (+x).toString(16).padStart(2, '0')).join('') : value;
+    };
+
+    const computedColors = {};
+    for (const selector of colorSelectors) {
+        const el = document.querySelector(selector);
+        if (el) {
+            const style = styleOf(el);
+            computedColors[selector] = {
+                color: toHex(style.color),
+                backgroundColor: toHex(style.backgroundColor),
+                borderColor: toHex(style.borderTopColor)
+            };
+        }
+    }
+
+    const typographySelectors = [
+        'body', 'h1', 'h2', 'h3', 'h4', 'p', 'a', 'button', 'nav', '.btn', 'strong', 'em'
+    ];
+    const typography = {};
+    for (const selector of typographySelectors) {
+        const el = selector === 'body' ? document.body : document.querySelector(selector);
+        if (el) {
+            const style = styleOf(el);
+            typography[selector] = {
+                fontFamily: style.fontFamily,
+                fontSize: style.fontSize,
+                fontWeight: style.fontWeight,
+                fontStyle: style.fontStyle,
+                lineHeight: style.lineHeight,
+                letterSpacing: style.letterSpacing,
+                textTransform: style.textTransform
+            };
+        }
+    }
+
+    // Logo: the first image with a src, checked in LOGO_SELECTORS order. Images are
+    // never downloaded (see FIREFOX_USER_PREFS), so naturalWidth/Height are always 0;
+    // the size comes from the width/height attributes, else the rendered box.
+    let logo = null;
+    for (const selector of logoSelectors) {
+        const img = document.querySelector(selector);
+        if (img && img.getAttribute('src')) {
+            const rect = img.getBoundingClientRect();
+            logo = {
+                url: img.getAttribute('src'),
+                alt: img.getAttribute('alt') || '',
+                width: parseInt(img.getAttribute('width'), 10) || Math.round(rect.width),
+                height: parseInt(img.getAttribute('height'), 10) || Math.round(rect.height)
+            };
+            break;
+        }
+    }
+
+    // SVG logos: up to 3 svg elements with "logo" in their class or id
+    const svgLogos = [];
+    const logoPattern = /logo/i;
+    for (const svg of document.getElementsByTagName('svg')) {
+        const svgClass = svg.getAttribute('class') || '';
+        const svgId = svg.getAttribute('id') || '';
+        if (logoPattern.test(svgClass) || logoPattern.test(svgId)) {
+            svgLogos.push({
+                class: svgClass.split(/\s+/).filter(Boolean),
+                id: svgId,
+                viewBox: svg.getAttribute('viewBox') || ''
+            });
+            if (svgLogos.length === 3) break;
+        }
+    }
+
+    // Favicon and touch icons, in one pass over the icon links. The first
+    // "shortcut icon" link takes precedence over the first plain "icon" link.
+    const faviconLinks = {};
+    const touchIcons = [];
+    for (const link of document.querySelectorAll('link[rel*="icon" i]')) {
+        const href = link.getAttribute('href');
+        if (!href) continue;
+        const rel = link.getAttribute('rel').toLowerCase();
+        if (rel === 'apple-touch-icon') {
+            touchIcons.push({ url: href, sizes: link.getAttribute('sizes') || '' });
+        } else if ((rel === 'icon' || rel === 'shortcut icon') && !(rel in faviconLinks)) {
+            faviconLinks[rel] = { url: href, type: link.getAttribute('type') || '' };
+        }
+    }
+
+    // Open Graph image, falling back to the Twitter card image
+    const metaContent = (selector) => {
+        const meta = document.querySelector(selector);
+        return (meta && meta.getAttribute('content')) || null;
+    };
+
+    const assets = {
+        logo,
+        svgLogos,
+        favicon: faviconLinks['shortcut icon'] || faviconLinks['icon'] || null,
+        touchIcons,
+        ogImage: metaContent('meta[property="og:image"]') || metaContent('meta[name="twitter:image"]')
+    };
+
+    const designPatterns = {
+        buttons: {},
+        spacing: {},
+        borders: {},
+        shadows: []
+    };
+
+    const button = document.querySelector('button, .btn, .button, [role="button"]');
+    if (button) {
+        const style = styleOf(button);
+        designPatterns.buttons = {
+            padding: style.padding,
+            borderRadius: style.borderRadius,
+            backgroundColor: style.backgroundColor,
+            color: style.color,
+            fontSize: style.fontSize,
+            fontWeight: style.fontWeight,
+            border: style.border,
+            textTransform: style.textTransform,
+            boxShadow: style.boxShadow
+        };
+    }
+
+    // Spacing from the first container element
+    const container = document.querySelector('section, .container, main');
+    if (container) {
+        const style = styleOf(container);
+        designPatterns.spacing = {
+            padding: style.padding,
+            margin: style.margin,
+            gap: style.gap
+        };
+    }
+
+    // Border radius and shadow values from the first 100 elements in the body, in one
+    // pass; the walker stops there instead of collecting every element on the page
+    const walker = document.createTreeWalker(document.body || document.documentElement, NodeFilter.SHOW_ELEMENT);
+    const radiusValues = new Set();
+    const shadowValues = new Set();
+    for (let i = 0, el; i < 100 && (el = walker.nextNode()); i++) {
+        const style = styleOf(el);
+        const radius = style.borderRadius;
+        if (radius && radius !== '0px') {
+            radiusValues.add(radius);
+        }
+        const shadow = style.boxShadow;
+        if (shadow && shadow !== 'none') {
+            shadowValues.add(shadow);
+        }
+    }
+    designPatterns.borders = {
+        radiusValues: Array.from(radiusValues).slice(0, 10)
+    };
+    designPatterns.shadows = Array.from(shadowValues).slice(0, 10);
+
+    return { cssVars, computedColors, typography, assets, designPatterns, title: document.title };
+}
+"""
+
 # --- URLs to Analyze ---
 URL_INPUT_FILE = "urls_to_analyze.txt"
 
+# --- Navigation Timeouts (ms) ---
+# Dead URLs fail after NAVIGATION_TIMEOUT_MS; slow pages are analyzed as-is after
+# LOAD_STATE_TIMEOUT_MS rather than waiting for the network to go idle
+NAVIGATION_TIMEOUT_MS = 30000
+LOAD_STATE_TIMEOUT_MS = 15000
+
+# --- Browser ---
+# Pages analyzed at once, and the persistent Firefox profile (under output/) that
+# keeps the browser's caches warm between runs
+MAX_CONCURRENCY = 4
+# URLs on the same host are analyzed one at a time, at least this many seconds apart
+# (plus up to a second of jitter). Distinct hosts are not delayed.
+HOST_MIN_INTERVAL_SECONDS = 2.0
+PROFILE_DIR_NAME = ".playwright-profile"
+# Firefox preferences that stop images, media, websockets and background requests
+# (beacons, prefetches) from loading. Branding reads styles and request URLs only.
+# These are set as prefs rather than with context.route(), because routing disables
+# the HTTP cache that the persistent profile keeps warm. Fonts, stylesheets and scripts
+# load (from cache when possible); computed styles and font service detection need them.
+FIREFOX_USER_PREFS = {
+    "permissions.default.image": 2,   # never load images
+    "media.autoplay.default": 5,      # block all autoplay
+    "media.preload.default": 0,       # don't preload media the page doesn't play
+    "media.preload.auto": 0,
+    "network.websocket.max-connections": 0,
+    "beacon.enabled": False,
+    "network.prefetch-next": False,
+    "network.dns.disablePrefetch": True,
+    "network.predictor.enabled": False,
+}
+
 
 def load_urls_from_file(filename):
     """Loads URLs from a specified file, one URL per line."""
@@ -103,51 +379,78 @@ def load_urls_from_file(filename):
 # --- HELPER FUNCTIONS ---
 # -----------------------------------------------------------------------------
 
-def extract_color_from_rgb(rgb_string):
-    """Convert RGB/RGBA string to hex color."""
-    if not rgb_string or rgb_string == 'transparent':
-        return None
-
-    # Match rgb(r, g, b) or rgba(r, g, b, a)
-    match = re.match(r'rgba?\((\d+),\s*(\d+),\s*(\d+)(?:,\s*[\d.]+)?\)', rgb_string)
-    if match:
-        r, g, b = match.groups()
-        return f"#{int(r):02x}{int(g):02x}{int(b):02x}"
-    return rgb_string
-
-
 def is_color_value(value):
     """Check if a string value represents a color."""
     if not value or not isinstance(value, str):
         return False
 
     value = value.strip().lower()
+    if not value:
+        return False
 
-    # Check for hex colors
-    if re.match(r'^#[0-9a-f]{3,8}$', value):
-        return True
-
-    # Check for rgb/rgba
-    if value.startswith(('rgb(', 'rgba(')):
-        return True
-
-    # Check for hsl/hsla
-    if value.startswith(('hsl(', 'hsla(')):
+    # Dispatch on the first character; most CSS variables (spacing, durations,
+    # shadows) are rejected without touching a regex
+    c0 = value[0]
+    if c0 == '#':
+        return _HEX_RE.match(value) is not None
+    if c0 == 'r' and value.startswith(('rgb(', 'rgba(')):
         return True
-
-    # Check for named colors (basic check)
-    named_colors = ['red', 'blue', 'green', 'yellow', 'black', 'white',
-                    'gray', 'grey', 'purple', 'orange', 'pink', 'brown']
-    if value in named_colors:
+    if c0 == 'h' and value.startswith(('hsl(', 'hsla(')):
         return True
 
-    return False
+    return value in _NAMED_COLORS
 
 
 # -----------------------------------------------------------------------------
 # --- CLASSIFICATION FUNCTIONS ---
 # -----------------------------------------------------------------------------
 
+# --- CSS Variable Name Hints ---
+# Plain substrings matched against lowercased variable names
+_PRIMARY_SUBS = ("primary", "brand", "main", "hero")
+_ACCENT_SUBS = ("accent", "secondary", "highlight", "alt")
+_NEUTRAL_SUBS = ("gray", "grey", "black", "white", "neutral")
+# More specific utility patterns to avoid false matches with color names
+_SUCCESS_SUBS = ("success", "positive")
+_ERROR_SUBS = ("error", "danger", "negative")
+_WARNING_SUBS = ("warning", "caution", "alert")
+_INFO_SUBS = ("info", "notice")
+# Color name patterns - these are accents unless matched to utility patterns first
+_COLOR_NAME_SUBS = ("color-red", "color-orange", "color-yellow", "color-green",
+                    "color-blue", "color-purple", "color-pink", "color-teal",
+                    "color-magenta", "color-cyan")
+_SHADE_MODIFIERS = ("-light", "-dark", "-lighter", "-darker")
+
+
+def _substring_re(subs):
+    """Compile substrings into one alternation, so a name is tested with a single search."""
+    return re.compile("|".join(map(re.escape, subs)))
+
+
+# (role, name pattern, confidence, classification bucket), checked in order; first match wins.
+# Utility roles fill the single slot classification["utility"][bucket].
+_ROLE_TABLE = (
+    ("primary", _substring_re(_PRIMARY_SUBS), 0.95, "primary"),
+    ("accent", _substring_re(_ACCENT_SUBS), 0.90, "accents"),
+    ("neutral", _substring_re(_NEUTRAL_SUBS), 0.95, "neutrals"),
+    ("utility_success", _substring_re(_SUCCESS_SUBS), 0.90, "success"),
+    ("utility_error", _substring_re(_ERROR_SUBS), 0.90, "error"),
+    ("utility_warning", _substring_re(_WARNING_SUBS), 0.90, "warning"),
+    ("utility_info", _substring_re(_INFO_SUBS), 0.85, "info"),
+)
+_COLOR_NAME_RE = _substring_re(_COLOR_NAME_SUBS)
+# Light/dark/opacity variations of a named color (-light, -dark, ..., -5, -10, -15, etc.)
+_SHADE_RE = re.compile(_substring_re(_SHADE_MODIFIERS).pattern + r'|-\d+$')
+
+
+def _color_key(color_value):
+    """Normalize a color for duplicate checks, so '#FFF' and '#ffffff' count as one color."""
+    key = color_value.strip().lower()
+    if len(key) == 4 and key[0] == '#':
+        key = '#' + ''.join(c * 2 for c in key[1:])
+    return key
+
+
 def classify_colors(color_palette, computed_colors_dict):
     """
     Classify colors into primary, accent, neutral, and utility categories.
@@ -177,93 +480,39 @@ def classify_colors(color_palette, computed_colors_dict):
     css_vars = color_palette.get('css_custom_properties', {})
     frequency = color_palette.get('color_frequency', {})
 
-    # Analyze CSS variable names for semantic meaning
-    primary_patterns = [r'primary', r'brand', r'main', r'hero']
-    accent_patterns = [r'accent', r'secondary', r'highlight', r'alt']
-    neutral_patterns = [r'gray', r'grey', r'black', r'white', r'neutral']
-    # More specific utility patterns to avoid false matches with color names
-    success_patterns = [r'success', r'positive']
-    error_patterns = [r'error', r'danger', r'negative']
-    warning_patterns = [r'warning', r'caution', r'alert']
-    info_patterns = [r'info', r'notice']
-
-    # Color name patterns - these are accents unless matched to utility patterns first
-    color_name_patterns = [r'color-red', r'color-orange', r'color-yellow', r'color-green',
-                          r'color-blue', r'color-purple', r'color-pink', r'color-teal',
-                          r'color-magenta', r'color-cyan']
-
     # Track colors we've already classified
     classified_colors = set()
 
     # Pass 1: Classify by CSS variable names (highest confidence)
     for var_name, color_value in css_vars.items():
         var_lower = var_name.lower()
+        color_key = _color_key(color_value)
         confidence = 0.0
         role = None
         evidence = [f"CSS variable name: {var_name}"]
 
-        # Check for primary
-        if any(re.search(pattern, var_lower) for pattern in primary_patterns):
-            role = "primary"
-            confidence = 0.95
-            if color_value not in classified_colors:
-                classification["primary"].append(color_value)
-                classified_colors.add(color_value)
-
-        # Check for accent
-        elif any(re.search(pattern, var_lower) for pattern in accent_patterns):
-            role = "accent"
-            confidence = 0.90
-            if color_value not in classified_colors:
-                classification["accents"].append(color_value)
-                classified_colors.add(color_value)
-
-        # Check for neutrals
-        elif any(re.search(pattern, var_lower) for pattern in neutral_patterns):
-            role = "neutral"
-            confidence = 0.95
-            if color_value not in classified_colors:
-                classification["neutrals"].append(color_value)
-                classified_colors.add(color_value)
-
-        # Check for utility colors
-        elif any(re.search(pattern, var_lower) for pattern in success_patterns):
-            classification["utility"]["success"] = color_value
-            confidence = 0.90
-            role = "utility_success"
-            classified_colors.add(color_value)
-
-        elif any(re.search(pattern, var_lower) for pattern in error_patterns):
-            classification["utility"]["error"] = color_value
-            confidence = 0.90
-            role = "utility_error"
-            classified_colors.add(color_value)
-
-        elif any(re.search(pattern, var_lower) for pattern in warning_patterns):
-            classification["utility"]["warning"] = color_value
-            confidence = 0.90
-            role = "utility_warning"
-            classified_colors.add(color_value)
-
-        elif any(re.search(pattern, var_lower) for pattern in info_patterns):
-            classification["utility"]["info"] = color_value
-            confidence = 0.85
-            role = "utility_info"
-            classified_colors.add(color_value)
-
-        # Check for color name patterns (e.g., --color-blue, --color-orange)
-        # These are accents unless already classified as utility
-        elif any(re.search(pattern, var_lower) for pattern in color_name_patterns):
+        for table_role, pattern, table_confidence, bucket in _ROLE_TABLE:
+            if pattern.search(var_lower):
+                role = table_role
+                confidence = table_confidence
+                if role.startswith("utility_"):
+                    classification["utility"][bucket] = color_value
+                    classified_colors.add(color_key)
+                elif color_key not in classified_colors:
+                    classification[bucket].append(color_value)
+                    classified_colors.add(color_key)
+                break
+        else:
+            # Check for color name patterns (e.g., --color-blue, --color-orange)
+            # These are accents unless already classified as utility.
             # Only add base color names, not light/dark/opacity variations
-            # Exclude: -light, -dark, -lighter, -darker, -5, -10, -15, etc.
-            if not any(modifier in var_lower for modifier in ['-light', '-dark', '-lighter', '-darker']) \
-               and not re.search(r'-\d+$', var_lower):
+            if _COLOR_NAME_RE.search(var_lower) and not _SHADE_RE.search(var_lower):
                 role = "accent"
                 confidence = 0.85
                 evidence.append("Named color variable")
-                if color_value not in classified_colors:
+                if color_key not in classified_colors:
                     classification["accents"].append(color_value)
-                    classified_colors.add(color_value)
+                    classified_colors.add(color_key)
 
         # Record confidence if classified
         if role and color_value not in confidence_scores:
@@ -276,8 +525,9 @@ def classify_colors(color_palette, computed_colors_dict):
     # Pass 2: Analyze frequency and element hierarchy
     for selector, styles in computed_colors_dict.items():
         for prop, color_value in styles.items():
-            if color_value in classified_colors:
-                continue  # Already classified
+            color_key = _color_key(color_value)
+            if color_key in classified_colors:
+                continue  # Already classified, so it isn't in any classification list either
 
             evidence = [f"Found in {selector}.{prop}"]
             confidence = 0.5
@@ -292,9 +542,8 @@ def classify_colors(color_palette, computed_colors_dict):
                     evidence.append(f"Used in important element: {selector}")
                     confidence = 0.75
                     role = "primary"
-                    if color_value not in classification["primary"]:
-                        classification["primary"].append(color_value)
-                        classified_colors.add(color_value)
+                    classification["primary"].append(color_value)
+                    classified_colors.add(color_key)
 
             # Colors in secondary/accent elements
             accent_selectors = ['[class*="secondary"]', 'a']
@@ -305,9 +554,8 @@ def classify_colors(color_palette, computed_colors_dict):
                     evidence.append(f"Used in accent element: {selector}")
                     confidence = 0.65
                     role = "accent"
-                    if color_value not in classification["accents"]:
-                        classification["accents"].append(color_value)
-                        classified_colors.add(color_value)
+                    classification["accents"].append(color_value)
+                    classified_colors.add(color_key)
 
             # Record confidence if classified
             if role and color_value not in confidence_scores:
@@ -393,7 +641,7 @@ def classify_fonts(typography, typography_data):
 
         # Accent/display fonts (used sparingly, in special elements)
         elif selector in ['button', '.btn', 'nav', 'strong'] and font_clean not in classified_fonts:
-            if font_clean not in [classification["primary_heading"], classification["body_text"]]:
+            if font_clean != classification["primary_heading"] and font_clean != classification["body_text"]:
                 classification["accent_display"].append(font_clean)
                 confidence = 0.70
                 role = "accent"
@@ -428,8 +676,446 @@ def classify_fonts(typography, typography_data):
 # --- MAIN FUNCTION ---
 # -----------------------------------------------------------------------------
 
-def main():
-    """Main execution function for branding analysis."""
+async def evaluate_page(page):
+    """Run PAGE_ANALYSIS_JS on the page, returning an empty dict if it fails."""
+    try:
+        return await page.evaluate(PAGE_ANALYSIS_JS, list(LOGO_SELECTORS))
+    except Exception as e:
+        print(f"    Could not extract page styles: {e}")
+        return {}
+
+
+async def analyze_page(context, current_url):
+    """Navigate to a single URL in the given browser context and collect its branding data.
+
+    Returns the url_result_object for the URL; failures are reported in it with
+    fetch_status "error" rather than raised.
+    """
+    print(f"\nAttempting to navigate to: {current_url}")
+
+    # One timestamp per URL, taken when its fetch starts, for both outcomes
+    page_fetch_time_iso = datetime.now(timezone.utc).isoformat()
+    requests_log = []
+    page = None
+
+    try:
+        page = await context.new_page()
+        page.on("request", lambda request: requests_log.append(request.url))
+
+        print(f"  Navigating to {current_url}...")
+        # Styles are available once the DOM and stylesheets are in; waiting for
+        # networkidle mostly waits on ads and analytics, so give "load" a short cap
+        # and carry on with whatever has rendered
+        await page.goto(current_url, wait_until="domcontentloaded", timeout=NAVIGATION_TIMEOUT_MS)
+        try:
+            await page.wait_for_load_state("load", timeout=LOAD_STATE_TIMEOUT_MS)
+        except Exception as e_load:
+            print(f"    INFO: Load event not reached, continuing: {e_load}")
+        print(f"  Page navigation completed.")
+
+        await page.wait_for_selector("body", timeout=10000)
+
+        # CSS variables, element colors, typography and the title come back from one evaluate
+        print(f"  Extracting CSS variables, colors and typography...")
+        page_styles = await evaluate_page(page)
+
+        # Basic Cloudflare detection
+        if _CF_RE.search(page_styles.get("title") or ""):
+            print(f"    INFO: Cloudflare detected. Waiting...")
+            try:
+                await page.wait_for_timeout(5000)
+                await page.wait_for_selector("body", timeout=10000)
+                print(f"    INFO: Cloudflare resolved.")
+            except Exception as e_cf:
+                print(f"    WARNING: Cloudflare wait failed: {e_cf}")
+            page_styles = await evaluate_page(page)
+
+        print(f"Successfully navigated to: {current_url}")
+
+        # ============================================================
+        # === BRANDING ANALYSIS: COLOR PALETTE ===
+        # ============================================================
+
+        color_palette = {
+            "css_custom_properties": {},
+            "computed_colors": {},
+            "primary_colors": [],
+            "color_frequency": {}
+        }
+
+        css_variables = page_styles.get("cssVars")
+        computed_colors = page_styles.get("computedColors") or {}
+        typography_data = page_styles.get("typography") or {}
+
+        # Filter CSS custom properties (CSS variables)
+        try:
+            if css_variables:
+                # Filter for color-related variables
+                for prop, value in css_variables.items():
+                    if is_color_value(value):
+                        color_palette["css_custom_properties"][prop] = value
+
+            print(f"    Found {len(color_palette['css_custom_properties'])} color variables")
+
+        except Exception as e:
+            print(f"    Could not process CSS variables: {e}")
+
+        # Collect computed colors from key elements
+        try:
+            if computed_colors:
+                # Colors arrive as hex from the page script; drop the transparent ones
+                all_colors = []
+                for selector, styles in computed_colors.items():
+                    processed = {prop: value for prop, value in styles.items() if value}
+                    if processed:
+                        color_palette["computed_colors"][selector] = processed
+                        all_colors.extend(processed.values())
+
+                # Count color frequency and take the top colors (ties keep first-seen order)
+                top_colors = Counter(all_colors).most_common(15)
+
+                color_palette["primary_colors"] = [c[0] for c in top_colors[:10]]
+                color_palette["color_frequency"] = dict(top_colors)
+
+                print(f"    Extracted {len(all_colors)} color values from {len(computed_colors)} elements")
+
+        except Exception as e:
+            print(f"    Could not process computed colors: {e}")
+
+        # ============================================================
+        # === BRANDING ANALYSIS: TYPOGRAPHY ===
+        # ============================================================
+
+        typography = {
+            "web_font_services": [],
+            "font_families_used": {},
+            "custom_fonts_loaded": [],
+            "google_fonts_detected": [],
+            "typeface_hierarchy": {}
+        }
+
+        # Detect font services from network requests
+        print(f"  Detecting font services...")
+        # Pages often request the same URL many times; scan each one once,
+        # keeping first-seen order for custom_fonts_loaded
+        for req_url in dict.fromkeys(requests_log):
+            # A URL can match several services (e.g. a .woff2 on fonts.gstatic.com);
+            # handle them in signature order
+            matched_groups = {m.lastgroup for m in _FONT_RE.finditer(req_url)}
+            if not matched_groups:
+                continue
+            for group, service_name in _FONT_SERVICE_GROUPS.items():
+                if group not in matched_groups:
+                    continue
+                if service_name == "CustomWebFonts":
+                    # Store the actual font file URL
+                    if req_url not in typography["custom_fonts_loaded"]:
+                        typography["custom_fonts_loaded"].append(req_url)
+                elif service_name == "GoogleFonts":
+                    # Extract font family names from Google Fonts URLs
+                    # css?family=A:400|B (v1) and css2?family=A:wght@400&family=B (v2);
+                    # parse_qs decodes '+' and %-escapes in the names
+                    for family in parse_qs(urlparse(req_url).query).get('family', []):
+                        for font in family.split('|'):
+                            font_name = font.split(':', 1)[0]
+                            if font_name not in typography["google_fonts_detected"]:
+                                typography["google_fonts_detected"].append(font_name)
+
+                if service_name not in typography["web_font_services"]:
+                    typography["web_font_services"].append(service_name)
+
+        print(f"    Found {len(typography['web_font_services'])} font services")
+
+        # Build the typeface hierarchy from key elements' computed fonts
+        try:
+            if typography_data:
+                typography["font_families_used"] = typography_data
+
+                # Extract unique font families for hierarchy
+                unique_fonts = {}
+                for selector, styles in typography_data.items():
+                    family = styles.get('fontFamily', '')
+                    if family and family not in unique_fonts:
+                        unique_fonts[family] = {
+                            'used_in': [selector],
+                            'sample_size': styles.get('fontSize'),
+                            'sample_weight': styles.get('fontWeight')
+                        }
+                    elif family:
+                        unique_fonts[family]['used_in'].append(selector)
+
+                typography["typeface_hierarchy"] = unique_fonts
+                print(f"    Extracted typography from {len(typography_data)} elements")
+
+        except Exception as e:
+            print(f"    Could not process typography data: {e}")
+
+        # ============================================================
+        # === BRANDING ANALYSIS: VISUAL ASSETS ===
+        # ============================================================
+
+        visual_assets = {
+            "logo": {
+                "url": None,
+                "alt_text": None,
+                "dimensions": None
+            },
+            "favicon": {
+                "url": None,
+                "type": None
+            },
+            "og_image": None,
+            "touch_icons": [],
+            "svg_logos": []
+        }
+
+        print(f"  Extracting visual assets...")
+        assets = page_styles.get("assets") or {}
+
+        logo = assets.get("logo")
+        if logo:
+            visual_assets["logo"]["url"] = logo["url"]
+            visual_assets["logo"]["alt_text"] = logo["alt"]
+            visual_assets["logo"]["dimensions"] = {
+                "width": logo["width"],
+                "height": logo["height"]
+            }
+
+        visual_assets["svg_logos"] = assets.get("svgLogos") or []
+
+        favicon = assets.get("favicon")
+        if favicon:
+            visual_assets["favicon"]["url"] = favicon["url"]
+            visual_assets["favicon"]["type"] = favicon["type"]
+        visual_assets["touch_icons"] = assets.get("touchIcons") or []
+
+        visual_assets["og_image"] = assets.get("ogImage")
+
+        print(f"    Extracted logo: {visual_assets['logo']['url']}")
+        print(f"    Extracted favicon: {visual_assets['favicon']['url']}")
+
+        # ============================================================
+        # === BRANDING ANALYSIS: DESIGN PATTERNS ===
+        # ============================================================
+
+        design_patterns = {
+            "button_styles": {},
+            "spacing_system": {},
+            "border_radius": {},
+            "shadows": []
+        }
+
+        print(f"  Analyzing design patterns...")
+        design_data = page_styles.get("designPatterns")
+        if design_data:
+            design_patterns["button_styles"] = design_data.get("buttons", {})
+            design_patterns["spacing_system"] = design_data.get("spacing", {})
+            design_patterns["border_radius"] = design_data.get("borders", {})
+            design_patterns["shadows"] = design_data.get("shadows", [])
+
+            print(f"    Extracted design patterns")
+
+        # ============================================================
+        # === INTELLIGENT CLASSIFICATION ===
+        # ============================================================
+
+        print(f"  Classifying colors and fonts...")
+
+        # --- Color Classification ---
+        color_classification = classify_colors(
+            color_palette,
+            color_palette["computed_colors"]
+        )
+
+        # --- Font Classification ---
+        font_classification = classify_fonts(
+            typography,
+            typography_data
+        )
+
+        # ============================================================
+        # === COMPILE RESULTS ===
+        # ============================================================
+
+        page_title_val = page_styles.get("title")
+
+        data_for_json = {
+            "color_palette": color_palette,
+            "color_classification": color_classification.get("color_classification", {}),
+            "color_confidence_scores": color_classification.get("confidence_scores", {}),
+            "typography": typography,
+            "font_classification": font_classification.get("font_classification", {}),
+            "font_confidence_scores": font_classification.get("confidence_scores", {}),
+            "visual_assets": visual_assets,
+            "design_patterns": design_patterns
+        }
+
+        url_result_object = {
+            "url": current_url,
+            "fetch_status": "success",
+            "error_details": None,
+            "fetch_timestamp_utc": page_fetch_time_iso,
+            "page_title": page_title_val,
+            "data": data_for_json
+        }
+
+        return url_result_object
+
+    except Exception as e:
+        print(f"Could not process {current_url}. Error: {e}")
+        url_result_object = {
+            "url": current_url,
+            "fetch_status": "error",
+            "error_details": str(e),
+            "fetch_timestamp_utc": page_fetch_time_iso,
+            "page_title": None,
+            "data": None
+        }
+        return url_result_object
+
+    finally:
+        # close() is a no-op on an already closed page
+        if page:
+            try:
+                await page.close()
+            except Exception:
+                pass
+
+
+async def collect_branding(urls_to_process, profile_dir, on_result, max_concurrency=MAX_CONCURRENCY):
+    """Analyze URLs concurrently in one persistent browser context.
+
+    The Firefox profile in profile_dir is reused between runs, so caches survive and
+    the browser starts warm. At most max_concurrency pages are open at once, and URLs
+    sharing a host are paced by HOST_MIN_INTERVAL_SECONDS. Each
+    result is handed to on_result(index, result) as soon as its URL finishes, so
+    results are never all held in memory. Returns collection_start_time_utc.
+    """
+    async with async_playwright() as p:
+        context = await p.firefox.launch_persistent_context(
+            profile_dir,
+            headless=True,
+            user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
+            viewport={"width": 1920, "height": 1080},
+            locale="en-US",
+            timezone_id="America/New_York",
+            java_script_enabled=True,
+            ignore_https_errors=True,
+            firefox_user_prefs=FIREFOX_USER_PREFS
+        )
+        try:
+            print(f"Browser launched (profile: {profile_dir}).")
+
+            collection_start_time_utc = datetime.now(timezone.utc)
+            slots = asyncio.Semaphore(max_concurrency)
+
+            host_locks = defaultdict(asyncio.Lock)
+            host_last_seen = {}
+
+            async def process_url(index, url):
+                host = urlparse(url).netloc
+                async with host_locks[host]:
+                    # Pace before taking a slot, so no slot sits idle during the delay
+                    if host in host_last_seen:
+                        delay = HOST_MIN_INTERVAL_SECONDS - (time.monotonic() - host_last_seen[host])
+                        if delay > 0:
+                            await asyncio.sleep(delay + random.uniform(0, 1))
+                    try:
+                        async with slots:
+                            result = await analyze_page(context, url)
+                    finally:
+                        host_last_seen[host] = time.monotonic()
+                    on_result(index, result)
+
+            await asyncio.gather(*(process_url(index, url) for index, url in enumerate(urls_to_process)))
+            return collection_start_time_utc
+
+        finally:
+            print("\nAttempting to close browser resources...")
+            try:
+                await context.close()
+                print("Browser closed.")
+            except Exception as e_close:
+                print(f"Error during browser close: {e_close}")
+
+
+def write_branding_output(output_filename, collection_metadata, results_file, result_offsets):
+    """
+    Write the final output JSON from per-URL results spooled to a JSON Lines file.
+
+    Results are read back one at a time, in URL order, from the byte offsets recorded
+    when they were spooled, so memory stays bounded by the largest single result. Every
+    offset must be set. The file is laid out as json.dump(..., indent=2) of the whole
+    object would be, except that non-ASCII text is written as UTF-8 rather than \\u
+    escapes and floats in exponent form are written as orjson formats them (1e20 and
+    1e-7 rather than 1e+20 and 1e-07).
+    """
+    with open(output_filename, 'wb') as f:
+        header = orjson.dumps({"collection_metadata": collection_metadata}, option=orjson.OPT_INDENT_2)
+        f.write(header[:-2] + b',\n  "url_analysis_results": [')
+        for i, offset in enumerate(result_offsets):
+            results_file.seek(offset)
+            result = orjson.loads(results_file.readline())
+            f.write(b',\n    ' if i else b'\n    ')
+            f.write(orjson.dumps(result, option=orjson.OPT_INDENT_2).replace(b'\n', b'\n    '))
+        f.write(b'\n  ]\n}' if result_offsets else b']\n}')
+
+
+def print_branding_summary(result_item):
+    """Print the console summary for one URL's result, as a single write."""
+    lines = [f"\nBranding analysis for {result_item['url']}:"]
+
+    if result_item['fetch_status'] == "error":
+        lines.append(f"  Error: {result_item['error_details']}")
+        print("\n".join(lines))
+        return
+
+    data_payload = result_item.get('data')
+    if not data_payload:
+        lines.append("  Error: No data payload found.")
+        print("\n".join(lines))
+        return
+
+    lines.append(f"  Page Title: {result_item.get('page_title', 'Not found')}")
+
+    # Color Palette
+    colors = data_payload.get('color_palette', {})
+    lines.append(f"  Color Palette:")
+    lines.append(f"    CSS Variables: {len(colors.get('css_custom_properties', {}))} found")
+    lines.append(f"    Primary Colors: {colors.get('primary_colors', [])[:5]}")
+
+    # Typography
+    typo = data_payload.get('typography', {})
+    lines.append(f"  Typography:")
+    lines.append(f"    Font Services: {typo.get('web_font_services', [])}")
+    lines.append(f"    Google Fonts: {typo.get('google_fonts_detected', [])}")
+    lines.append(f"    Unique Typefaces: {len(typo.get('typeface_hierarchy', {}))}")
+
+    # Visual Assets
+    assets = data_payload.get('visual_assets', {})
+    lines.append(f"  Visual Assets:")
+    lines.append(f"    Logo URL: {assets.get('logo', {}).get('url', 'Not found')}")
+    lines.append(f"    Favicon: {assets.get('favicon', {}).get('url', 'Not found')}")
+    lines.append(f"    OG Image: {assets.get('og_image', 'Not found')}")
+
+    # Design Patterns
+    patterns = data_payload.get('design_patterns', {})
+    lines.append(f"  Design Patterns:")
+    button_styles = patterns.get('button_styles', {})
+    if button_styles:
+        lines.append(f"    Button Border Radius: {button_styles.get('borderRadius', 'N/A')}")
+        lines.append(f"    Button Padding: {button_styles.get('padding', 'N/A')}")
+    lines.append(f"    Shadow Styles: {len(patterns.get('shadows', []))} variations")
+
+    print("\n".join(lines))
+
+
+def main(base_dir=""):
+    """Main execution function for branding analysis.
+
+    urls_to_analyze.txt and the output/ directory are resolved against base_dir
+    (default: the current working directory), so launchers never need os.chdir().
+    """
 
     # --- Argument Parsing ---
     parser = argparse.ArgumentParser(
@@ -439,7 +1125,25 @@ def main():
         "-u", "--url",
         help="A single URL to analyze. If provided, urls_to_analyze.txt will be ignored."
     )
+    parser.add_argument(
+        "--reset-profile",
+        action="store_true",
+        help="Delete the cached browser profile (output/.playwright-profile) before starting."
+    )
+    parser.add_argument(
+        "-c", "--concurrency",
+        type=int,
+        default=MAX_CONCURRENCY,
+        help=f"Number of pages to analyze at once (default: {MAX_CONCURRENCY})."
+    )
+    parser.add_argument(
+        "-q", "--quiet",
+        action="store_true",
+        help="Don't print the per-URL branding summary."
+    )
     args = parser.parse_args()
+    if args.concurrency < 1:
+        parser.error("--concurrency must be at least 1")
 
     urls_to_process = []
 
@@ -450,7 +1154,7 @@ def main():
         urls_to_process = [single_url]
         print(f"INFO: Analyzing single URL: {single_url}")
     else:
-        urls_to_process = load_urls_from_file(URL_INPUT_FILE)
+        urls_to_process = load_urls_from_file(os.path.join(base_dir, URL_INPUT_FILE))
 
     if not urls_to_process:
         print("INFO: No URLs to analyze. Exiting.")
@@ -458,643 +1162,81 @@ def main():
 
     print("DeepStack Branding Collector starting...")
 
-    with sync_playwright() as p:
-        browser = p.firefox.launch(headless=True)
-        context = browser.new_context(
-            user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
-            viewport={"width": 1920, "height": 1080},
-            locale="en-US",
-            timezone_id="America/New_York",
-            java_script_enabled=True,
-            ignore_https_errors=True
-        )
-        print("Browser launched.")
-
-        collection_start_time_utc = datetime.now(timezone.utc)
-        processed_urls_results_list = []
-        successful_fetches = 0
-        failed_fetches = 0
-
-        for current_url in urls_to_process:
-            time.sleep(random.uniform(2, 5))
-            print(f"\nAttempting to navigate to: {current_url}")
-
-            requests_log = []
-            page = None
-
-            try:
-                page = context.new_page()
-                page.on("request", lambda request: requests_log.append(request.url))
-
-                print(f"  Navigating to {current_url}...")
-                page.goto(current_url, wait_until="networkidle", timeout=90000)
-                print(f"  Page navigation completed.")
-
-                # Basic Cloudflare detection
-                initial_title = page.title()
-                cloudflare_indicators = [
-                    "Just a moment...",
-                    "Checking your browser",
-                    "Please wait"
-                ]
-
-                if any(indicator in initial_title for indicator in cloudflare_indicators):
-                    print(f"    INFO: Cloudflare detected. Waiting...")
-                    try:
-                        page.wait_for_timeout(5000)
-                        print(f"    INFO: Cloudflare resolved.")
-                    except Exception as e_cf:
-                        print(f"    WARNING: Cloudflare wait failed: {e_cf}")
-
-                page.wait_for_selector("body", timeout=10000)
-                print(f"Successfully navigated to: {current_url}")
-
-                html_content = page.content()
-                soup = BeautifulSoup(html_content, "html.parser")
-
-                # ============================================================
-                # === BRANDING ANALYSIS: COLOR PALETTE ===
-                # ============================================================
-
-                color_palette = {
-                    "css_custom_properties": {},
-                    "computed_colors": {},
-                    "primary_colors": [],
-                    "color_frequency": {}
-                }
-
-                # Extract CSS custom properties (CSS variables)
-                print(f"  Extracting CSS variables...")
-                try:
-                    css_variables = page.evaluate("""
-                        () => {
-                            const vars = {};
-
-                            // Try to get from :root computed style
-                            const rootStyle = getComputedStyle(document.documentElement);
-
-                            // Get all CSS custom properties from stylesheets
-                            for (let sheet of document.styleSheets) {
-                                try {
-                                    for (let rule of sheet.cssRules || sheet.rules) {
-                                        if (rule.selectorText === ':root' && rule.style) {
-                                            for (let i = 0; i < rule.style.length; i++) {
-                                                const prop = rule.style[i];
-                                                if (prop.startsWith('--')) {
-                                                    vars[prop] = rule.style.getPropertyValue(prop).trim();
-                                                }
-                                            }
-                                        }
-                                    }
-                                } catch(e) { /* CORS or invalid rule */ }
-                            }
-
-                            return vars;
-                        }
-                    """)
-
-                    if css_variables:
-                        # Filter for color-related variables
-                        for prop, value in css_variables.items():
-                            if is_color_value(value):
-                                color_palette["css_custom_properties"][prop] = value
-
-                    print(f"    Found {len(color_palette['css_custom_properties'])} color variables")
-
-                except Exception as e:
-                    print(f"    Could not extract CSS variables: {e}")
-
-                # Extract computed colors from key elements
-                print(f"  Extracting computed colors from elements...")
-                try:
-                    computed_colors = page.evaluate("""
-                        () => {
-                            const selectors = [
-                                'body',
-                                'header',
-                                'nav',
-                                'h1', 'h2', 'h3',
-                                'a',
-                                'button',
-                                '.btn', '.button',
-                                'footer',
-                                '.hero', '.banner',
-                                '[class*="primary"]',
-                                '[class*="secondary"]'
-                            ];
-
-                            const colors = {};
-
-                            selectors.forEach(selector => {
-                                const el = document.querySelector(selector);
-                                if (el) {
-                                    const style = getComputedStyle(el);
-                                    colors[selector] = {
-                                        color: style.color,
-                                        backgroundColor: style.backgroundColor,
-                                        borderColor: style.borderTopColor
-                                    };
-                                }
-                            });
-
-                            return colors;
-                        }
-                    """)
-
-                    if computed_colors:
-                        # Process and normalize colors
-                        all_colors = []
-                        for selector, styles in computed_colors.items():
-                            processed = {}
-                            for prop, value in styles.items():
-                                if value and value != 'rgba(0, 0, 0, 0)' and value != 'transparent':
-                                    hex_color = extract_color_from_rgb(value)
-                                    if hex_color:
-                                        processed[prop] = hex_color
-                                        all_colors.append(hex_color)
-
-                            if processed:
-                                color_palette["computed_colors"][selector] = processed
-
-                        # Count color frequency
-                        color_freq = {}
-                        for color in all_colors:
-                            color_freq[color] = color_freq.get(color, 0) + 1
-
-                        # Sort by frequency and take top colors
-                        sorted_colors = sorted(
-                            color_freq.items(),
-                            key=lambda x: x[1],
-                            reverse=True
-                        )
-
-                        color_palette["primary_colors"] = [c[0] for c in sorted_colors[:10]]
-                        color_palette["color_frequency"] = dict(sorted_colors[:15])
-
-                        print(f"    Extracted {len(all_colors)} color values from {len(computed_colors)} elements")
-
-                except Exception as e:
-                    print(f"    Could not extract computed colors: {e}")
-
-                # ============================================================
-                # === BRANDING ANALYSIS: TYPOGRAPHY ===
-                # ============================================================
-
-                typography = {
-                    "web_font_services": [],
-                    "font_families_used": {},
-                    "custom_fonts_loaded": [],
-                    "google_fonts_detected": [],
-                    "typeface_hierarchy": {}
-                }
-
-                # Detect font services from network requests
-                print(f"  Detecting font services...")
-                for req_url in requests_log:
-                    for service_name, patterns in FONT_SERVICE_SIGNATURES.items():
-                        for pattern in patterns:
-                            if re.search(pattern, req_url, re.IGNORECASE):
-                                if service_name == "CustomWebFonts":
-                                    # Store the actual font file URL
-                                    if req_url not in typography["custom_fonts_loaded"]:
-                                        typography["custom_fonts_loaded"].append(req_url)
-                                elif service_name == "GoogleFonts":
-                                    # Extract font family names from Google Fonts URLs
-                                    family_match = re.search(r'family=([^&]+)', req_url)
-                                    if family_match:
-                                        fonts = family_match.group(1).split('|')
-                                        for font in fonts:
-                                            font_name = font.split(':')[0].replace('+', ' ')
-                                            if font_name not in typography["google_fonts_detected"]:
-                                                typography["google_fonts_detected"].append(font_name)
-
-                                if service_name not in typography["web_font_services"]:
-                                    typography["web_font_services"].append(service_name)
-                                break
-
-                print(f"    Found {len(typography['web_font_services'])} font services")
-
-                # Extract computed fonts from key elements
-                print(f"  Extracting typography from elements...")
-                try:
-                    typography_data = page.evaluate("""
-                        () => {
-                            const elements = {
-                                'body': document.body,
-                                'h1': document.querySelector('h1'),
-                                'h2': document.querySelector('h2'),
-                                'h3': document.querySelector('h3'),
-                                'h4': document.querySelector('h4'),
-                                'p': document.querySelector('p'),
-                                'a': document.querySelector('a'),
-                                'button': document.querySelector('button'),
-                                'nav': document.querySelector('nav'),
-                                '.btn': document.querySelector('.btn'),
-                                'strong': document.querySelector('strong'),
-                                'em': document.querySelector('em')
-                            };
-
-                            const fonts = {};
-
-                            for (let [key, el] of Object.entries(elements)) {
-                                if (el) {
-                                    const style = getComputedStyle(el);
-                                    fonts[key] = {
-                                        fontFamily: style.fontFamily,
-                                        fontSize: style.fontSize,
-                                        fontWeight: style.fontWeight,
-                                        fontStyle: style.fontStyle,
-                                        lineHeight: style.lineHeight,
-                                        letterSpacing: style.letterSpacing,
-                                        textTransform: style.textTransform
-                                    };
-                                }
-                            }
-
-                            return fonts;
-                        }
-                    """)
-
-                    if typography_data:
-                        typography["font_families_used"] = typography_data
-
-                        # Extract unique font families for hierarchy
-                        unique_fonts = {}
-                        for selector, styles in typography_data.items():
-                            family = styles.get('fontFamily', '')
-                            if family and family not in unique_fonts:
-                                unique_fonts[family] = {
-                                    'used_in': [selector],
-                                    'sample_size': styles.get('fontSize'),
-                                    'sample_weight': styles.get('fontWeight')
-                                }
-                            elif family:
-                                unique_fonts[family]['used_in'].append(selector)
-
-                        typography["typeface_hierarchy"] = unique_fonts
-                        print(f"    Extracted typography from {len(typography_data)} elements")
-
-                except Exception as e:
-                    print(f"    Could not extract typography data: {e}")
-
-                # ============================================================
-                # === BRANDING ANALYSIS: VISUAL ASSETS ===
-                # ============================================================
-
-                visual_assets = {
-                    "logo": {
-                        "url": None,
-                        "alt_text": None,
-                        "dimensions": None
-                    },
-                    "favicon": {
-                        "url": None,
-                        "type": None
-                    },
-                    "og_image": None,
-                    "touch_icons": [],
-                    "svg_logos": []
-                }
-
-                # Extract logo
-                print(f"  Extracting visual assets...")
-                logo_selectors = [
-                    'img[class*="logo" i]',
-                    'img[id*="logo" i]',
-                    'a[class*="logo" i] img',
-                    '.logo img',
-                    '#logo img',
-                    'header img',
-                    'nav img'
-                ]
-
-                for selector in logo_selectors:
-                    logo = soup.select_one(selector)
-                    if logo and logo.get('src'):
-                        visual_assets["logo"]["url"] = logo.get('src')
-                        visual_assets["logo"]["alt_text"] = logo.get('alt', '')
-
-                        # Try to get dimensions
-                        try:
-                            dims = page.evaluate(f"""
-                                () => {{
-                                    const img = document.querySelector('{selector}');
-                                    if (img) {{
-                                        return {{
-                                            width: img.naturalWidth || img.width,
-                                            height: img.naturalHeight || img.height
-                                        }};
-                                    }}
-                                    return null;
-                                }}
-                            """)
-                            if dims:
-                                visual_assets["logo"]["dimensions"] = dims
-                        except:
-                            pass
-
-                        break
-
-                # Look for SVG logos
-                svg_logos = soup.select('svg[class*="logo" i], svg[id*="logo" i]')
-                if svg_logos:
-                    for svg in svg_logos[:3]:  # Limit to first 3
-                        visual_assets["svg_logos"].append({
-                            "class": svg.get('class', []),
-                            "id": svg.get('id', ''),
-                            "viewBox": svg.get('viewBox', '')
-                        })
-
-                # Favicon
-                favicon_selectors = [
-                    'link[rel="icon"]',
-                    'link[rel="shortcut icon"]',
-                    'link[rel="apple-touch-icon"]'
-                ]
-
-                for selector in favicon_selectors:
-                    for link in soup.select(selector):
-                        href = link.get('href')
-                        if href:
-                            if 'apple-touch-icon' in link.get('rel', []):
-                                visual_assets["touch_icons"].append({
-                                    "url": href,
-                                    "sizes": link.get('sizes', '')
-                                })
-                            else:
-                                visual_assets["favicon"]["url"] = href
-                                visual_assets["favicon"]["type"] = link.get('type', '')
-                                break
-
-                # Open Graph image
-                og_image = soup.find('meta', property='og:image')
-                if og_image and og_image.get('content'):
-                    visual_assets["og_image"] = og_image.get('content')
-
-                # Twitter card image (fallback)
-                if not visual_assets["og_image"]:
-                    twitter_image = soup.find('meta', attrs={'name': 'twitter:image'})
-                    if twitter_image and twitter_image.get('content'):
-                        visual_assets["og_image"] = twitter_image.get('content')
-
-                print(f"    Extracted logo: {visual_assets['logo']['url']}")
-                print(f"    Extracted favicon: {visual_assets['favicon']['url']}")
-
-                # ============================================================
-                # === BRANDING ANALYSIS: DESIGN PATTERNS ===
-                # ============================================================
-
-                design_patterns = {
-                    "button_styles": {},
-                    "spacing_system": {},
-                    "border_radius": {},
-                    "shadows": []
-                }
+    # Create output directory
+    output_dir = os.path.join(base_dir, "output")
+    Path(output_dir).mkdir(parents=True, exist_ok=True)
 
-                print(f"  Analyzing design patterns...")
-                try:
-                    design_data = page.evaluate("""
-                        () => {
-                            const patterns = {
-                                buttons: {},
-                                spacing: {},
-                                borders: {},
-                                shadows: []
-                            };
-
-                            // Analyze buttons
-                            const buttons = document.querySelectorAll('button, .btn, .button, [role="button"]');
-                            if (buttons.length > 0) {
-                                const firstBtn = buttons[0];
-                                const style = getComputedStyle(firstBtn);
-                                patterns.buttons = {
-                                    padding: style.padding,
-                                    borderRadius: style.borderRadius,
-                                    backgroundColor: style.backgroundColor,
-                                    color: style.color,
-                                    fontSize: style.fontSize,
-                                    fontWeight: style.fontWeight,
-                                    border: style.border,
-                                    textTransform: style.textTransform,
-                                    boxShadow: style.boxShadow
-                                };
-                            }
-
-                            // Analyze spacing (from container elements)
-                            const containers = document.querySelectorAll('section, .container, main');
-                            if (containers.length > 0) {
-                                const style = getComputedStyle(containers[0]);
-                                patterns.spacing = {
-                                    padding: style.padding,
-                                    margin: style.margin,
-                                    gap: style.gap
-                                };
-                            }
-
-                            // Collect border radius values
-                            const elementsWithRadius = document.querySelectorAll('*');
-                            const radiusValues = new Set();
-                            for (let i = 0; i < Math.min(elementsWithRadius.length, 100); i++) {
-                                const el = elementsWithRadius[i];
-                                const radius = getComputedStyle(el).borderRadius;
-                                if (radius && radius !== '0px') {
-                                    radiusValues.add(radius);
-                                }
-                            }
-                            patterns.borders = {
-                                radiusValues: Array.from(radiusValues).slice(0, 10)
-                            };
-
-                            // Collect shadow values
-                            const shadowValues = new Set();
-                            for (let i = 0; i < Math.min(elementsWithRadius.length, 100); i++) {
-                                const el = elementsWithRadius[i];
-                                const shadow = getComputedStyle(el).boxShadow;
-                                if (shadow && shadow !== 'none') {
-                                    shadowValues.add(shadow);
-                                }
-                            }
-                            patterns.shadows = Array.from(shadowValues).slice(0, 10);
-
-                            return patterns;
-                        }
-                    """)
-
-                    if design_data:
-                        design_patterns["button_styles"] = design_data.get("buttons", {})
-                        design_patterns["spacing_system"] = design_data.get("spacing", {})
-                        design_patterns["border_radius"] = design_data.get("borders", {})
-                        design_patterns["shadows"] = design_data.get("shadows", [])
-
-                        print(f"    Extracted design patterns")
-
-                except Exception as e:
-                    print(f"    Could not extract design patterns: {e}")
-
-                # ============================================================
-                # === INTELLIGENT CLASSIFICATION ===
-                # ============================================================
-
-                print(f"  Classifying colors and fonts...")
-
-                # --- Color Classification ---
-                color_classification = classify_colors(
-                    color_palette,
-                    computed_colors
-                )
-
-                # --- Font Classification ---
-                font_classification = classify_fonts(
-                    typography,
-                    typography_data if 'typography_data' in locals() else {}
-                )
-
-                # ============================================================
-                # === COMPILE RESULTS ===
-                # ============================================================
-
-                page_fetch_time_utc = datetime.now(timezone.utc)
-                page_title_val = page.title()
-
-                data_for_json = {
-                    "color_palette": color_palette,
-                    "color_classification": color_classification.get("color_classification", {}),
-                    "color_confidence_scores": color_classification.get("confidence_scores", {}),
-                    "typography": typography,
-                    "font_classification": font_classification.get("font_classification", {}),
-                    "font_confidence_scores": font_classification.get("confidence_scores", {}),
-                    "visual_assets": visual_assets,
-                    "design_patterns": design_patterns
-                }
+    # Generate output filename
+    if args.url:
+        parsed_url = urlparse(args.url)
+        domain = parsed_url.netloc.replace('www.', '').replace(':', '_')
+        output_filename = os.path.join(output_dir, f"deepstack_branding-{domain}.json")
+    else:
+        output_filename = os.path.join(output_dir, "deepstack_branding.json")
 
-                url_result_object = {
-                    "url": current_url,
-                    "fetch_status": "success",
-                    "error_details": None,
-                    "fetch_timestamp_utc": page_fetch_time_utc.isoformat(),
-                    "page_title": page_title_val,
-                    "data": data_for_json
-                }
+    profile_dir = os.path.join(output_dir, PROFILE_DIR_NAME)
+    if args.reset_profile and os.path.isdir(profile_dir):
+        shutil.rmtree(profile_dir)
+        print(f"Deleted browser profile: {profile_dir}/")
 
-                processed_urls_results_list.append(url_result_object)
-                successful_fetches += 1
-
-            except Exception as e:
-                print(f"Could not process {current_url}. Error: {e}")
-                page_fetch_time_utc = datetime.now(timezone.utc)
-                url_result_object = {
-                    "url": current_url,
-                    "fetch_status": "error",
-                    "error_details": str(e),
-                    "fetch_timestamp_utc": page_fetch_time_utc.isoformat(),
-                    "page_title": None,
-                    "data": None
-                }
-                processed_urls_results_list.append(url_result_object)
-                failed_fetches += 1
+    # Each finished URL is appended to a JSON Lines spool file right away, so only
+    # its offset stays in memory and completed URLs survive a crash mid-batch. The
+    # spool and the final file are both written with orjson.
+    results_filename = output_filename + ".partial.jsonl"
+    try:
+        results_file = open(results_filename, 'w+b')
+    except IOError as e:
+        print(f"\nError opening {results_filename} for writing: {e}")
+        return
 
-            finally:
-                try:
-                    if page and not page.is_closed():
-                        page.close()
-                except:
-                    pass
-                time.sleep(1)
+    result_offsets = [None] * len(urls_to_process)
+    fetch_counts = {"success": 0, "error": 0}
+
+    def on_result(index, result_item):
+        results_file.seek(0, os.SEEK_END)
+        result_offsets[index] = results_file.tell()
+        results_file.write(orjson.dumps(result_item) + b"\n")
+        results_file.flush()
+        fetch_counts[result_item["fetch_status"]] += 1
+        if not args.quiet:
+            print_branding_summary(result_item)
+
+    with results_file:
+        collection_start_time_utc = asyncio.run(
+            collect_branding(urls_to_process, profile_dir, on_result, args.concurrency)
+        )
 
         # =====================================================================
         # === FINAL OUTPUT ===
         # =====================================================================
 
-        final_json_output = {
-            "collection_metadata": {
-                "collector_version": "1.0.0",
-                "collector_type": "branding",
-                "collection_timestamp_utc": collection_start_time_utc.isoformat(),
-                "total_urls_processed": len(urls_to_process),
-                "total_urls_successful": successful_fetches,
-                "total_urls_failed": failed_fetches
-            },
-            "url_analysis_results": processed_urls_results_list
+        collection_metadata = {
+            "collector_version": "1.0.0",
+            "collector_type": "branding",
+            "collection_timestamp_utc": collection_start_time_utc.isoformat(),
+            "total_urls_processed": len(urls_to_process),
+            "total_urls_successful": fetch_counts["success"],
+            "total_urls_failed": fetch_counts["error"]
         }
 
-        # Create output directory
-        output_dir = "output"
-        if not os.path.exists(output_dir):
-            os.makedirs(output_dir)
-            print(f"Created output directory: {output_dir}/")
-
-        # Generate output filename
-        if args.url:
-            parsed_url = urlparse(args.url)
-            domain = parsed_url.netloc.replace('www.', '').replace(':', '_')
-            output_filename = os.path.join(output_dir, f"deepstack_branding-{domain}.json")
-        else:
-            output_filename = os.path.join(output_dir, "deepstack_branding.json")
+        missing = [url for url, offset in zip(urls_to_process, result_offsets) if offset is None]
+        if missing:
+            print(f"\nNo result was recorded for {len(missing)} URL(s): {', '.join(missing)}")
+            print(f"Finished results are kept in {results_filename}")
+            return
 
         try:
-            with open(output_filename, 'w') as f:
-                json.dump(final_json_output, f, indent=2)
+            write_branding_output(output_filename, collection_metadata, results_file, result_offsets)
             print(f"\nResults successfully saved to {output_filename}")
         except IOError as e:
             print(f"\nError writing results to {output_filename}: {e}")
+            print(f"Per-URL results are kept in {results_filename}")
+            return
         except TypeError as e:
             print(f"\nError serializing data to JSON: {e}")
+            return
 
-        # Console output summary
-        print("\n--- Branding Analysis Summary ---")
-        for result_item in processed_urls_results_list:
-            print(f"\nBranding analysis for {result_item['url']}:")
-
-            if result_item['fetch_status'] == "error":
-                print(f"  Error: {result_item['error_details']}")
-                continue
-
-            data_payload = result_item.get('data')
-            if not data_payload:
-                print("  Error: No data payload found.")
-                continue
-
-            print(f"  Page Title: {result_item.get('page_title', 'Not found')}")
-
-            # Color Palette
-            colors = data_payload.get('color_palette', {})
-            print(f"  Color Palette:")
-            print(f"    CSS Variables: {len(colors.get('css_custom_properties', {}))} found")
-            print(f"    Primary Colors: {colors.get('primary_colors', [])[:5]}")
-
-            # Typography
-            typo = data_payload.get('typography', {})
-            print(f"  Typography:")
-            print(f"    Font Services: {typo.get('web_font_services', [])}")
-            print(f"    Google Fonts: {typo.get('google_fonts_detected', [])}")
-            print(f"    Unique Typefaces: {len(typo.get('typeface_hierarchy', {}))}")
-
-            # Visual Assets
-            assets = data_payload.get('visual_assets', {})
-            print(f"  Visual Assets:")
-            print(f"    Logo URL: {assets.get('logo', {}).get('url', 'Not found')}")
-            print(f"    Favicon: {assets.get('favicon', {}).get('url', 'Not found')}")
-            print(f"    OG Image: {assets.get('og_image', 'Not found')}")
-
-            # Design Patterns
-            patterns = data_payload.get('design_patterns', {})
-            print(f"  Design Patterns:")
-            button_styles = patterns.get('button_styles', {})
-            if button_styles:
-                print(f"    Button Border Radius: {button_styles.get('borderRadius', 'N/A')}")
-                print(f"    Button Padding: {button_styles.get('padding', 'N/A')}")
-            print(f"    Shadow Styles: {len(patterns.get('shadows', []))} variations")
-
-        print("\nAttempting to close browser resources...")
-        try:
-            if context:
-                context.close()
-                print("Browser context closed.")
-            if browser and browser.is_connected():
-                browser.close()
-                print("Browser closed.")
-        except Exception as e_close:
-            print(f"Error during browser close: {e_close}")
+    os.remove(results_filename)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,77 @@
+"""
+Smoke test for the web interface: submits a URL through /api/analyze and waits for
+the job to finish, with the real process pool and collector (nothing is patched).
+
+Run from the repository root with:  python -m unittest discover tests
+
+The page is served locally, so no network access is needed. Without a Playwright
+Firefox install the URL is recorded as fetch_status "error", but the job must still
+complete with one result for that URL.
+"""
+
+import os
+import sys
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import app
+from deepstack_collector import ANALYZE_TIMEOUT_SECONDS, ANALYZE_CLEANUP_SECONDS
+
+# The collector's own deadlines, plus time to start the worker process
+JOB_TIMEOUT_SECONDS = ANALYZE_TIMEOUT_SECONDS + ANALYZE_CLEANUP_SECONDS + 60
+
+
+class PageHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = b"<html><head><title>Smoke</title></head><body><h1>Smoke test page</h1></body></html>"
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class AnalyzeEndToEndTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), PageHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.client = app.app.test_client()
+        self.job_id = None
+
+    def tearDown(self):
+        self.server.shutdown()
+        if app._executor is not None:
+            app._executor.shutdown()
+        if self.job_id:
+            for path in app.JOBS_DIR.glob(f'{self.job_id}.*'):
+                path.unlink()
+        (app.OWNERS_DIR / str(os.getpid())).unlink(missing_ok=True)
+
+    def test_analyze_job_completes(self):
+        url = f'http://127.0.0.1:{self.server.server_address[1]}/'
+        response = self.client.post('/api/analyze', json={'url': url})
+        self.assertEqual(response.status_code, 200, response.get_json())
+        self.job_id = response.get_json()['job_id']
+
+        deadline = time.monotonic() + JOB_TIMEOUT_SECONDS
+        while True:
+            status = self.client.get(f'/api/status/{self.job_id}').get_json()
+            if status['status'] in ('completed', 'error') or time.monotonic() > deadline:
+                break
+            time.sleep(0.5)
+        self.assertEqual(status['status'], 'completed', status.get('error'))
+
+        result = self.client.get(f'/api/result/{self.job_id}').get_json()
+        self.assertEqual([r['url'] for r in result['url_analysis_results']], [url])
+
+
+if __name__ == '__main__':
+    unittest.main()
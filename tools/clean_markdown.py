@@ -9,35 +9,8 @@ from pathlib import Path
 from markdown_cleaner import clean_escaped_markdown
 
 
-def main():
-    parser = argparse.ArgumentParser(
-        description="Clean escaped markdown syntax from Google Docs downloads"
-    )
-    parser.add_argument(
-        "input_file", 
-        help="Input markdown file with escaped syntax"
-    )
-    parser.add_argument(
-        "output_file", 
-        nargs="?",
-        help="Output file (defaults to input_file if not specified)"
-    )
-    parser.add_argument(
-        "--dry-run", 
-        action="store_true",
-        help="Show what would be changed without writing to file"
-    )
-    
-    args = parser.parse_args()
-    
-    input_path = Path(args.input_file)
-    output_path = Path(args.output_file) if args.output_file else input_path
-    
-    # Check if input file exists
-    if not input_path.exists():
-        print(f"Error: Input file '{input_path}' does not exist.", file=sys.stderr)
-        return 1
-    
+def clean_file(input_path, output_path, dry_run=False):
+    """Clean one markdown file, writing the result to output_path. Returns an exit code."""
     # Read input file
     try:
         with open(input_path, 'r', encoding='utf-8') as f:
@@ -50,16 +23,21 @@ def main():
     cleaned_content = clean_escaped_markdown(content)
     
     # Show changes if dry run
-    if args.dry_run:
+    if dry_run:
         if content == cleaned_content:
-            print("No changes needed.")
+            print(f"No changes needed in '{input_path}'.")
         else:
-            print("Changes that would be made:")
+            print(f"Changes that would be made to '{input_path}':")
             print("=" * 50)
             print(cleaned_content)
             print("=" * 50)
         return 0
     
+    # Nothing to write back when cleaning in place left the file unchanged
+    if content == cleaned_content and output_path == input_path:
+        print(f"No changes needed in '{input_path}'")
+        return 0
+    
     # Write output file
     try:
         with open(output_path, 'w', encoding='utf-8') as f:
@@ -80,5 +58,47 @@ def main():
     return 0
 
 
+def main():
+    parser = argparse.ArgumentParser(
+        description="Clean escaped markdown syntax from Google Docs downloads"
+    )
+    parser.add_argument(
+        "input_file", 
+        help="Input markdown file with escaped syntax, or a directory of .md files"
+    )
+    parser.add_argument(
+        "output_file", 
+        nargs="?",
+        help="Output file or directory (defaults to input_file if not specified)"
+    )
+    parser.add_argument(
+        "--dry-run", 
+        action="store_true",
+        help="Show what would be changed without writing to file"
+    )
+    
+    args = parser.parse_args()
+    
+    input_path = Path(args.input_file)
+    output_path = Path(args.output_file) if args.output_file else input_path
+    
+    # Check if input file exists
+    if not input_path.exists():
+        print(f"Error: Input file '{input_path}' does not exist.", file=sys.stderr)
+        return 1
+    
+    if not input_path.is_dir():
+        return clean_file(input_path, output_path, args.dry_run)
+    
+    # Directory: clean every .md file below it, mirroring the layout under output_path
+    status = 0
+    for md_path in sorted(input_path.rglob('*.md')):
+        target_path = output_path / md_path.relative_to(input_path)
+        if not args.dry_run:
+            target_path.parent.mkdir(parents=True, exist_ok=True)
+        status |= clean_file(md_path, target_path, args.dry_run)
+    return status
+
+
 if __name__ == "__main__":
     sys.exit(main())
\ No newline at end of file
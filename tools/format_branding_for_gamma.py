@@ -13,22 +13,27 @@ import json
 import argparse
 import sys
 from pathlib import Path
-from collections import Counter
+from collections import namedtuple
 import re
 
+try:
+    import ijson  # Optional: streams just the parts of large branding files we need
+except ImportError:
+    ijson = None
+
+try:
+    import orjson  # Optional: faster full parse when ijson isn't installed
+except ImportError:
+    orjson = None
+
+
+# 3, 6 or 8 hex digits, with an optional leading '#'
+_HEX_RE = re.compile(r'#?(?:[0-9A-Fa-f]{3}|[0-9A-Fa-f]{6}|[0-9A-Fa-f]{8})')
+
 
 def is_valid_hex(hex_color):
     """Check if string is a valid hex color."""
-    if not hex_color:
-        return False
-    hex_color = hex_color.lstrip('#')
-    if len(hex_color) not in [3, 6, 8]:
-        return False
-    try:
-        int(hex_color, 16)
-        return True
-    except ValueError:
-        return False
+    return bool(hex_color) and _HEX_RE.fullmatch(hex_color) is not None
 
 
 def hex_to_rgb(hex_color):
@@ -36,10 +41,11 @@ def hex_to_rgb(hex_color):
     if not is_valid_hex(hex_color):
         return (0, 0, 0)
     hex_color = hex_color.lstrip('#')
-    # Handle 3-digit hex
+    # Handle 3-digit hex; 8-digit hex drops its alpha byte
     if len(hex_color) == 3:
-        hex_color = ''.join([c*2 for c in hex_color])
-    return tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
+        hex_color = hex_color[0] * 2 + hex_color[1] * 2 + hex_color[2] * 2
+    r, g, b = bytes.fromhex(hex_color[:6])
+    return (r, g, b)
 
 
 def calculate_brightness(hex_color):
@@ -61,10 +67,25 @@ def is_neutral(hex_color):
     return max(r, g, b) - min(r, g, b) < 30
 
 
+# Computed-style selectors checked, in order, for the heading text color
+_HEADING_SELECTORS = ('h1', 'h2', 'h3')
+
+# Colors chosen for each slot of the Gamma.app palette
+Palette = namedtuple('Palette', [
+    'primary_accent',
+    'secondary_accents',
+    'heading_color',
+    'body_color',
+    'card_background',
+    'page_background'
+])
+
+
 def categorize_colors(data_payload):
     """
     Categorize colors using intelligent classification from branding collector.
     Uses the color_classification and color_confidence_scores from the JSON.
+    Returns a Palette.
     """
 
     # Get classification data
@@ -83,53 +104,135 @@ def categorize_colors(data_payload):
     else:
         primary_accent = '#0000FF'  # Fallback blue
 
-    # Secondary accents: Use remaining accents (up to 8 total)
-    if classified_primary and classified_accents:
-        # If we have a primary, use all accents for secondary
-        secondary_accents = [c.upper() for c in classified_accents[:8]]
-    elif classified_accents:
-        # If no primary, use remaining accents (skip first which became primary)
-        secondary_accents = [c.upper() for c in classified_accents[1:8]]
-    else:
-        secondary_accents = []
+    # Secondary accents: Use remaining accents (up to 8 total). With a primary, all
+    # accents are secondary; otherwise skip the first, which became the primary accent.
+    source = classified_accents[:8] if classified_primary else classified_accents[1:8]
+    secondary_accents = [c.upper() for c in source]
 
     # Pad with placeholders if needed to show 8 slots
-    while len(secondary_accents) < 8:
-        secondary_accents.append(None)
+    secondary_accents.extend([None] * (8 - len(secondary_accents)))
 
     # Extract text colors from computed styles
     heading_color = '#000000'
     body_color = '#272525'
 
     # Look for heading colors
-    for selector in ['h1', 'h2', 'h3']:
-        if selector in computed and 'color' in computed[selector]:
-            heading_color = computed[selector]['color']
+    for selector in _HEADING_SELECTORS:
+        entry = computed.get(selector)
+        if entry and 'color' in entry:
+            heading_color = entry['color']
             break
 
     # Look for body color
-    if 'body' in computed and 'color' in computed['body']:
-        body_color = computed['body']['color']
+    body_entry = computed.get('body') or {}
+    body_color = body_entry.get('color', body_color)
 
     # Extract background colors
     card_bg = '#FFFFFF'
     page_bg = None
 
-    if 'body' in computed and 'backgroundColor' in computed['body']:
-        bg = computed['body']['backgroundColor']
-        if bg and bg != 'rgba(0, 0, 0, 0)':
-            page_bg = bg
+    bg = body_entry.get('backgroundColor')
+    if bg and bg != 'rgba(0, 0, 0, 0)':
+        page_bg = bg
+
+    return Palette(
+        primary_accent=primary_accent,
+        secondary_accents=secondary_accents,
+        heading_color=heading_color,
+        body_color=body_color,
+        card_background=card_bg,
+        page_background=page_bg
+    )
 
+
+def load_branding_json(branding_json_path):
+    """
+    Load the collection metadata and the first URL result from a branding JSON file.
+
+    Only the first result is formatted, so when ijson is installed the file is streamed
+    and the remaining results are never built. Returns a dict shaped like the file
+    itself, with url_analysis_results holding at most that first result.
+    """
+    if ijson is None:
+        if orjson is not None:
+            data = orjson.loads(Path(branding_json_path).read_bytes())
+        else:
+            with open(branding_json_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        data['url_analysis_results'] = data.get('url_analysis_results', [])[:1]
+        return data
+
+    with open(branding_json_path, 'rb') as f:
+        metadata = next(ijson.items(f, 'collection_metadata', use_float=True), {})
+    with open(branding_json_path, 'rb') as f:
+        first_result = next(ijson.items(f, 'url_analysis_results.item', use_float=True), None)
     return {
-        'primary_accent': primary_accent,
-        'secondary_accents': secondary_accents,
-        'heading_color': heading_color,
-        'body_color': body_color,
-        'card_background': card_bg,
-        'page_background': page_bg
+        'collection_metadata': metadata,
+        'url_analysis_results': [first_result] if first_result is not None else []
     }
 
 
+# Report layout; the variable-length sections are rendered separately and dropped in
+_TEMPLATE = """\
+{rule}
+GAMMA.APP COLOR PALETTE
+{rule}
+Generated from: {url}
+Page Title: {page_title}
+Generated: {generated}
+{rule}
+
+THEME PALETTE
+{section_rule}
+
+Primary accent color:
+  {primary_accent}
+
+Secondary accent colors (optional):
+{secondary_block}
+
+TEXT
+{section_rule}
+
+Heading color:
+  {heading_color}
+
+Body color:
+  {body_color}
+
+{fonts_block}ACCESSIBILITY
+{section_rule}
+☑ Adjust colors for contrast and accessibility (recommended)
+
+BACKGROUND
+{section_rule}
+
+Card background color:
+  {card_background}
+
+Page background:
+  {page_background}
+
+{rule}
+FULL BRAND COLOR PALETTE (from CSS variables)
+{rule}
+{css_block}
+{rule}"""
+
+
+def _font_lines(label, font, font_confidence):
+    """Lines for one detected font: its name plus confidence, or a not-detected note."""
+    if not font:
+        return [label, "  (not detected)", ""]
+    lines = [label, f"  {font}"]
+    # Add confidence info if available
+    if font in font_confidence:
+        conf = font_confidence[font]
+        lines.append(f"  ({int(conf.get('confidence', 0) * 100)}% confidence - {conf.get('role', 'unknown')})")
+    lines.append("")
+    return lines
+
+
 def format_for_gamma(branding_json_path, output_path=None):
     """
     Read branding JSON and format it for Gamma.app.
@@ -143,8 +246,7 @@ def format_for_gamma(branding_json_path, output_path=None):
     """
 
     # Read the JSON file
-    with open(branding_json_path, 'r') as f:
-        data = json.load(f)
+    data = load_branding_json(branding_json_path)
 
     # Get the first URL result
     if not data.get('url_analysis_results'):
@@ -165,138 +267,65 @@ def format_for_gamma(branding_json_path, output_path=None):
     # Categorize colors using classification data
     palette = categorize_colors(data_payload)
 
-    # Format output
-    output_lines = []
-    output_lines.append("=" * 70)
-    output_lines.append(f"GAMMA.APP COLOR PALETTE")
-    output_lines.append("=" * 70)
-    output_lines.append(f"Generated from: {url}")
-    output_lines.append(f"Page Title: {page_title}")
-    output_lines.append(f"Generated: {data['collection_metadata']['collection_timestamp_utc']}")
-    output_lines.append("=" * 70)
-    output_lines.append("")
-
-    # Theme palette section
-    output_lines.append("THEME PALETTE")
-    output_lines.append("-" * 70)
-    output_lines.append("")
-    output_lines.append(f"Primary accent color:")
-    output_lines.append(f"  {palette['primary_accent']}")
-    output_lines.append("")
-
-    output_lines.append(f"Secondary accent colors (optional):")
-    for i, color in enumerate(palette['secondary_accents'], 1):
-        if color:
-            output_lines.append(f"  {i}. {color}")
-        else:
-            output_lines.append(f"  {i}. (empty)")
-    output_lines.append("")
-
-    # Text section
-    output_lines.append("TEXT")
-    output_lines.append("-" * 70)
-    output_lines.append("")
-    output_lines.append(f"Heading color:")
-    output_lines.append(f"  {palette['heading_color']}")
-    output_lines.append("")
-    output_lines.append(f"Body color:")
-    output_lines.append(f"  {palette['body_color']}")
-    output_lines.append("")
-
-    # Fonts section
+    # Secondary accents, with empty slots shown as placeholders
+    secondary_block = '\n'.join(
+        f"  {i}. {color or '(empty)'}" for i, color in enumerate(palette.secondary_accents, 1)
+    )
+
+    # Fonts section (omitted when the collector didn't classify fonts)
     font_classification = data_payload.get('font_classification', {})
     font_confidence = data_payload.get('font_confidence_scores', {})
-
+    fonts_block = ''
     if font_classification:
-        output_lines.append("FONTS")
-        output_lines.append("-" * 70)
-        output_lines.append("")
-
-        # Primary heading font
-        heading_font = font_classification.get('primary_heading')
-        if heading_font:
-            output_lines.append(f"Heading font:")
-            output_lines.append(f"  {heading_font}")
-            # Add confidence info if available
-            if heading_font in font_confidence:
-                conf = font_confidence[heading_font]
-                output_lines.append(f"  ({int(conf.get('confidence', 0) * 100)}% confidence - {conf.get('role', 'unknown')})")
-        else:
-            output_lines.append(f"Heading font:")
-            output_lines.append(f"  (not detected)")
-        output_lines.append("")
-
-        # Body text font
-        body_font = font_classification.get('body_text')
-        if body_font:
-            output_lines.append(f"Body font:")
-            output_lines.append(f"  {body_font}")
-            # Add confidence info if available
-            if body_font in font_confidence:
-                conf = font_confidence[body_font]
-                output_lines.append(f"  ({int(conf.get('confidence', 0) * 100)}% confidence - {conf.get('role', 'unknown')})")
-        else:
-            output_lines.append(f"Body font:")
-            output_lines.append(f"  (not detected)")
-        output_lines.append("")
+        font_lines = ["FONTS", "-" * 70, ""]
+        font_lines += _font_lines("Heading font:", font_classification.get('primary_heading'), font_confidence)
+        font_lines += _font_lines("Body font:", font_classification.get('body_text'), font_confidence)
 
         # Accent/display fonts
         accent_fonts = font_classification.get('accent_display', [])
         if accent_fonts:
-            output_lines.append(f"Accent/Display fonts:")
-            for font in accent_fonts:
-                output_lines.append(f"  • {font}")
-            output_lines.append("")
+            font_lines.append("Accent/Display fonts:")
+            font_lines.extend(f"  • {font}" for font in accent_fonts)
+            font_lines.append("")
 
         # Monospace/code font
         mono_font = font_classification.get('monospace_code')
         if mono_font:
-            output_lines.append(f"Code/Monospace font:")
-            output_lines.append(f"  {mono_font}")
-            output_lines.append("")
-
-    # Accessibility note
-    output_lines.append("ACCESSIBILITY")
-    output_lines.append("-" * 70)
-    output_lines.append("☑ Adjust colors for contrast and accessibility (recommended)")
-    output_lines.append("")
-
-    # Background section
-    output_lines.append("BACKGROUND")
-    output_lines.append("-" * 70)
-    output_lines.append("")
-    output_lines.append(f"Card background color:")
-    output_lines.append(f"  {palette['card_background']}")
-    output_lines.append("")
-    output_lines.append(f"Page background:")
-    if palette['page_background']:
-        output_lines.append(f"  {palette['page_background']}")
-    else:
-        output_lines.append(f"  None")
-    output_lines.append("")
+            font_lines += ["Code/Monospace font:", f"  {mono_font}", ""]
 
-    # Additional brand colors (for reference)
-    output_lines.append("=" * 70)
-    output_lines.append("FULL BRAND COLOR PALETTE (from CSS variables)")
-    output_lines.append("=" * 70)
+        fonts_block = '\n'.join(font_lines) + '\n'
 
+    # Additional brand colors (for reference)
+    css_lines = []
     css_vars = color_data.get('css_custom_properties', {})
     if css_vars:
-        # Group by color family
-        output_lines.append("")
-        for var_name, color_value in sorted(css_vars.items()):
-            if is_valid_hex(color_value):
-                output_lines.append(f"  {var_name}: {color_value.upper()}")
-
-    output_lines.append("")
-    output_lines.append("=" * 70)
-
-    formatted_output = '\n'.join(output_lines)
+        css_lines.append("")
+        # Filter to valid hex colors before sorting, so non-color variables aren't sorted
+        hex_vars = [(var_name, color_value.upper()) for var_name, color_value in css_vars.items()
+                    if is_valid_hex(color_value)]
+        hex_vars.sort(key=lambda item: item[0])
+        css_lines.extend(f"  {var_name}: {color_value}" for var_name, color_value in hex_vars)
+    css_lines.append("")
+
+    formatted_output = _TEMPLATE.format_map({
+        'rule': "=" * 70,
+        'section_rule': "-" * 70,
+        'url': url,
+        'page_title': page_title,
+        'generated': data['collection_metadata']['collection_timestamp_utc'],
+        'primary_accent': palette.primary_accent,
+        'secondary_block': secondary_block,
+        'heading_color': palette.heading_color,
+        'body_color': palette.body_color,
+        'fonts_block': fonts_block,
+        'card_background': palette.card_background,
+        'page_background': palette.page_background or 'None',
+        'css_block': '\n'.join(css_lines)
+    })
 
     # Save to file if output path specified
     if output_path:
-        with open(output_path, 'w') as f:
-            f.write(formatted_output)
+        Path(output_path).write_bytes(formatted_output.encode('utf-8'))
         print(f"Formatted palette saved to: {output_path}")
 
     return formatted_output
@@ -328,7 +357,9 @@ def main():
 
     if formatted:
         if not args.output:
-            print(formatted)
+            # One UTF-8 write straight to the byte stream, skipping the text layer
+            sys.stdout.flush()
+            sys.stdout.buffer.write(formatted.encode('utf-8') + b'\n')
     else:
         sys.exit(1)
 
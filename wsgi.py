@@ -0,0 +1,12 @@
+#!/usr/bin/env python3
+"""
+DeepStack Collector WSGI entry point
+Exposes the Flask app for production WSGI servers, e.g.:
+
+    gunicorn -w 4 -k gthread --threads 8 -b 127.0.0.1:5001 wsgi:app
+"""
+
+from app import app, PORT
+
+if __name__ == '__main__':
+    app.run(host='127.0.0.1', port=PORT, threaded=True)